@@ -0,0 +1,141 @@
+import math
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.views import View
+from rest_framework.authtoken.models import Token
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import denormalize, throttling
+from .authentication import get_credentials, set_credentials
+from .models import Segment, Brand, Vehicle
+from .serializers import SegmentSerializer, BrandSerializer, VehicleSerializer
+
+
+# Authorization: Token <key> のキー
+def get_token_key(request):
+    auth = request.headers.get("Authorization", "").split()
+    if len(auth) != 2 or auth[0].lower() != "token":
+        return None
+    return auth[1]
+
+
+# Authorization: Token <key> を非同期ORMで認証する（CachingTokenAuthenticationとキャッシュを共有）
+async def authenticate(request):
+    key = get_token_key(request)
+    if key is None:
+        return None
+    cached = get_credentials(key)
+    if cached is not None:
+        return cached[0]
+    try:
+        token = await Token.objects.select_related("user").aget(key=key)
+    except Token.DoesNotExist:
+        return None
+    if not token.user.is_active:
+        return None
+    set_credentials(key, token.user, token)
+    return token.user
+
+
+def _error(detail, status):
+    return JsonResponse({"detail": detail}, status=status)
+
+
+# ASGIで動作する読み取り専用のlist/retrieve（スレッドを占有せずに待機できる）
+# 1件・一覧の各要素はDRFのシリアライザと同じ形式で返す
+# 一覧はidのキーセットページネーション（?after=<id>&page_size=）
+class AsyncReadView(View):
+    http_method_names = ["get"]
+    queryset = None
+    serializer_class = None
+    # settings.API_PAGE_SIZESのキー
+    page_size_key = None
+
+    async def get(self, request, pk=None):
+        user = await authenticate(request)
+        if user is None:
+            return _error("Authentication credentials were not provided.", 401)
+        # DRFのビューと同じトークン・ルートごとのリクエスト数の制限（API_THROTTLE）
+        wait = throttling.take(
+            throttling.token_client(get_token_key(request)),
+            request.resolver_match.view_name,
+        )
+        if wait:
+            wait = math.ceil(wait)
+            response = _error(
+                f"Request was throttled. Expected available in {wait} seconds.", 429
+            )
+            response["Retry-After"] = str(wait)
+            return response
+        queryset = self.get_queryset(user)
+        if pk is not None:
+            return await self.retrieve(queryset, pk)
+        return await self.list(request, queryset)
+
+    def get_queryset(self, user):
+        return self.queryset.all()
+
+    async def retrieve(self, queryset, pk):
+        try:
+            instance = await queryset.aget(pk=pk)
+        except queryset.model.DoesNotExist:
+            return _error("Not found.", 404)
+        return JsonResponse(self.serializer_class(instance).data, encoder=JSONEncoder)
+
+    async def list(self, request, queryset):
+        try:
+            after = int(request.GET.get("after", 0))
+            page_size = self.get_page_size(request)
+        except ValueError:
+            return _error("Invalid after or page_size.", 400)
+
+        queryset = queryset.filter(pk__gt=after).order_by("pk")[: page_size + 1]
+        instances = [instance async for instance in queryset]
+        next_url = None
+        if len(instances) > page_size:
+            instances = instances[:page_size]
+            query = request.GET.copy()
+            query["after"] = instances[-1].pk
+            next_url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+        data = {
+            "next": next_url,
+            "results": self.serializer_class(instances, many=True).data,
+        }
+        return JsonResponse(data, encoder=JSONEncoder)
+
+    def get_page_size(self, request):
+        page_sizes = getattr(settings, "API_PAGE_SIZES", {})
+        default = page_sizes.get(self.page_size_key, 100)
+        page_size = int(request.GET.get("page_size", default))
+        if page_size < 1:
+            raise ValueError(page_size)
+        return min(page_size, page_sizes.get("max", 1000))
+
+
+class AsyncSegmentView(AsyncReadView):
+    queryset = Segment.objects.all()
+    serializer_class = SegmentSerializer
+    page_size_key = "segments"
+
+
+class AsyncBrandView(AsyncReadView):
+    queryset = Brand.objects.all()
+    serializer_class = BrandSerializer
+    page_size_key = "brands"
+
+
+class AsyncVehicleView(AsyncReadView):
+    queryset = Vehicle.objects.select_related("segment", "brand")
+    serializer_class = VehicleSerializer
+    page_size_key = "vehicles"
+
+    # VehicleViewSetと同様にAPI_VEHICLE_SCOPE="user"の場合はユーザーのVehicleのみ
+    def get_queryset(self, user):
+        queryset = super().get_queryset(user)
+        if getattr(settings, "API_VEHICLE_SCOPE", "all") == "user":
+            queryset = queryset.filter(user=user)
+        if denormalize.is_enabled():
+            queryset = queryset.select_related(None)
+        return queryset
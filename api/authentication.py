@@ -0,0 +1,84 @@
+import copy
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from rest_framework.authentication import TokenAuthentication
+
+from . import hashing
+from .lru import LRUCache
+
+
+def _create_token_cache():
+    options = {"MAX_SIZE": 10000, "TTL": 300}
+    options.update(getattr(settings, "API_TOKEN_CACHE", {}))
+    return LRUCache(max_size=options["MAX_SIZE"], ttl=options["TTL"])
+
+
+# トークン → (user, token) のキャッシュ
+# プロセスごとに保持するため、他プロセスでの削除・無効化はTTL経過後に反映される
+# 保持したインスタンスはリクエストに渡さず、get_credentials()で複製して返す
+token_cache = _create_token_cache()
+
+
+# (user, token)を複製する（あるリクエストでのrequest.userの変更が同時に処理中の他のリクエストに及ばないようにする）
+def _copy_credentials(user, token):
+    user, token = copy.copy(user), copy.copy(token)
+    token.user = user
+    return user, token
+
+
+def get_credentials(key):
+    cached = token_cache.get(key)
+    if cached is None:
+        return None
+    return _copy_credentials(*cached)
+
+
+def set_credentials(key, user, token):
+    token_cache.set(key, _copy_credentials(user, token))
+
+
+# トークンとユーザーの検索結果をキャッシュするTokenAuthentication
+# キャッシュヒット時は認証でDBにアクセスしない
+class CachingTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cached = get_credentials(key)
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        set_credentials(key, user, token)
+        return user, token
+
+
+# トークンが削除された場合
+def invalidate_token(key):
+    token_cache.pop(key)
+
+
+# ユーザーが更新（無効化など）された場合はそのユーザーのトークンをすべて削除
+# post_saveシグナル（api.signals）から呼ばれるため、シグナルを送らない
+# User.objects.filter(...).update(is_active=False)などのQuerySet.update()はTTL経過まで反映されない
+# （その場合は更新後にinvalidate_user()を呼ぶ）
+def invalidate_user(user_id):
+    token_cache.discard_where(lambda cached: cached[0].pk == user_id)
+
+
+# パスワードの検証をhashing.poolで行うModelBackend（/api/auth/・Basic認証・管理画面）
+# 古いハッシュ方式のパスワードはログイン時に優先する方式で保存し直す
+class PooledModelBackend(ModelBackend):
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # 存在しないユーザーでも応答時間が変わらないようハッシュ計算を行う
+            hashing.make_password(password)
+            return None
+        if hashing.check_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+from django.test import AsyncClient, Client
+
+from api.models import Vehicle
+
+from .runner import _format, summarize
+
+# 同じ内容の同期（DRF）・非同期（ASGI）のエンドポイント
+# （pathは{id}（Vehicleのid）を置換する）
+CONCURRENCY_SCENARIOS = [
+    ("vehicles.list", "/api/vehicles/", "/api/async/vehicles/"),
+    ("vehicles.retrieve", "/api/vehicles/{id}/", "/api/async/vehicles/{id}/"),
+    ("segments.list", "/api/segments/", "/api/async/segments/"),
+]
+
+
+# 同期のビューをthreads個のスレッドで処理する（WSGIワーカーのスレッド数に相当）
+# concurrency件を同時に送っても、処理できるのはthreads件ずつになる
+def run_sync(path, headers, requests, threads):
+    client = Client(headers=headers)
+
+    def send(_):
+        start = time.perf_counter()
+        try:
+            status = client.get(path).status_code
+        finally:
+            connections.close_all()
+        return time.perf_counter() - start, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(send, range(requests)))
+    return results, time.perf_counter() - started
+
+
+# 非同期のビューを1つのイベントループでconcurrency件ずつ同時に処理する
+def run_async(path, headers, requests, concurrency):
+    async def run():
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                return time.perf_counter() - start, response.status_code
+
+        return await asyncio.gather(*(send() for _ in range(requests)))
+
+    started = time.perf_counter()
+    results = asyncio.run(run())
+    return results, time.perf_counter() - started
+
+
+# 同期・非同期の各シナリオを同じ件数・同時接続数で実行し、スループット・p50/p99を比較する
+def run_concurrency(user, requests=200, concurrency=50, threads=4, names=None):
+    headers = {"Authorization": f"Token {user.auth_token.key}"}
+    first = Vehicle.objects.order_by("id").values_list("id", flat=True).first()
+
+    results = []
+    for name, sync_path, async_path in CONCURRENCY_SCENARIOS:
+        if names and not any(name.startswith(prefix) for prefix in names):
+            continue
+        runs = [
+            ("sync", sync_path, run_sync, threads),
+            ("async", async_path, run_async, concurrency),
+        ]
+        for mode, path, run, workers in runs:
+            path = _format(path, {"id": first})
+            timings, elapsed = run(path, headers, requests, workers)
+            result = summarize(
+                f"concurrency.{name}.{mode}",
+                "get",
+                path,
+                [latency for latency, _ in timings],
+                [],
+                [status for _, status in timings],
+                elapsed,
+            )
+            result["concurrency"] = workers
+            results.append(result)
+    return results
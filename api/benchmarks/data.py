@@ -0,0 +1,74 @@
+import random
+import secrets
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+
+from api import versions
+from api.models import Brand, Segment, Vehicle
+
+SEGMENT_NAMES = ["SUV", "Sedan", "K-Car", "Minivan", "Wagon", "Coupe", "Truck"]
+BRAND_NAMES = ["Toyota", "Honda", "Nissan", "Mazda", "Subaru", "Tesla", "BMW"]
+VEHICLE_NAMES = ["MODEL", "CIVIC", "PRIUS", "LEAF", "CX", "IMPREZA", "RAV"]
+
+# ベンチマーク用ユーザーのパスワード
+PASSWORD = "benchmark"
+
+
+# ベンチマーク用のデータを作成する（seedが同じなら同じデータになる）
+# 件数が多くても高速に作成できるよう、ハッシュ済みパスワードを使い回してbulk_createする
+def seed(users=10, segments=7, brands=7, vehicles=1000, seed=0, batch_size=5000):
+    rng = random.Random(seed)
+    password = make_password(PASSWORD)
+
+    User.objects.bulk_create(
+        User(username=f"bench{i}", password=password) for i in range(users)
+    )
+    user_ids = list(
+        User.objects.filter(username__startswith="bench").values_list("id", flat=True)
+    )
+    Token.objects.bulk_create(
+        Token(key=secrets.token_hex(20), user_id=user_id) for user_id in user_ids
+    )
+    Segment.objects.bulk_create(
+        Segment(segment_name=_name(SEGMENT_NAMES, i)) for i in range(segments)
+    )
+    Brand.objects.bulk_create(
+        Brand(brand_name=_name(BRAND_NAMES, i)) for i in range(brands)
+    )
+    # bulk_createではシグナルが発火しないためバージョンを進めておく
+    for model in (Segment, Brand):
+        versions.bump(model)
+    add_vehicles(vehicles, user_ids, rng, batch_size)
+    return User.objects.filter(id__in=user_ids).order_by("id")
+
+
+# ランダムなVehicleをcount件、user_idsのいずれかのユーザーで作成する（既存のデータに追加できる）
+def add_vehicles(count, user_ids, rng, batch_size=5000):
+    # bulk_createではpre_saveシグナルが発火しないためSegment・Brandの名前もここでコピーする
+    segment_names = dict(Segment.objects.values_list("id", "segment_name"))
+    brand_names = dict(Brand.objects.values_list("id", "brand_name"))
+    segment_ids, brand_ids = list(segment_names), list(brand_names)
+    for start in range(0, count, batch_size):
+        vehicles = [
+            Vehicle(
+                user_id=rng.choice(user_ids),
+                vehicle_name=f"{rng.choice(VEHICLE_NAMES)} {i}",
+                release_year=rng.randint(2000, 2024),
+                price=f"{rng.uniform(100, 9999):.2f}",
+                segment_id=rng.choice(segment_ids),
+                brand_id=rng.choice(brand_ids),
+            )
+            for i in range(start, min(start + batch_size, count))
+        ]
+        for vehicle in vehicles:
+            vehicle.segment_name = segment_names[vehicle.segment_id]
+            vehicle.brand_name = brand_names[vehicle.brand_id]
+        Vehicle.objects.bulk_create(vehicles)
+    versions.bump(Vehicle)
+
+
+def _name(names, index):
+    name = names[index % len(names)]
+    return name if index < len(names) else f"{name} {index // len(names)}"
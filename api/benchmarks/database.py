@@ -0,0 +1,93 @@
+import threading
+import time
+
+from django.db import connection, connections
+from rest_framework.test import APIClient
+
+from api import database
+from api.models import Vehicle
+
+from .runner import summarize
+
+# 同時に実行する読み取り・書き込みのリクエスト（pathは{id}（Vehicleのid）を置換する）
+READ_PATHS = ["/api/vehicles/", "/api/vehicles/{id}/"]
+WRITE_DATA = {
+    "vehicle_name": "BENCH",
+    "release_year": 2020,
+    "price": "500.00",
+    "segment": 1,
+    "brand": 1,
+}
+
+
+# 接続設定のプロファイルを適用する（既存の接続は閉じ、次の接続から反映される）
+def use_profile(profile):
+    connections.close_all()
+    settings_dict = connection.settings_dict
+    for key in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS", "PRAGMAS"):
+        settings_dict.pop(key, None)
+    settings_dict.update({"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False})
+    settings_dict.update(profile)
+    # WALはDBファイルに保存されるため、PRAGMAのないプロファイルでは元に戻す
+    settings_dict.setdefault("PRAGMAS", {"journal_mode": "DELETE"})
+
+
+# readers・writersのスレッドからrequests件ずつ同時にリクエストする
+# ロック待ちのタイムアウトなどで失敗したリクエストは500として集計する
+def run_mixed(user, readers=4, writers=2, requests=50):
+    first = Vehicle.objects.order_by("id").values_list("id", flat=True).first()
+    paths = [path.format(id=first) for path in READ_PATHS]
+    timings = {"read": [], "write": []}
+    lock = threading.Lock()
+
+    def work(kind):
+        client = APIClient(raise_request_exception=False)
+        client.credentials(HTTP_AUTHORIZATION=f"Token {user.auth_token.key}")
+        results = []
+        try:
+            for i in range(requests):
+                start = time.perf_counter()
+                if kind == "read":
+                    response = client.get(paths[i % len(paths)])
+                else:
+                    response = client.post("/api/vehicles/", WRITE_DATA, format="json")
+                results.append((time.perf_counter() - start, response.status_code))
+        finally:
+            connections.close_all()
+        with lock:
+            timings[kind] += results
+
+    threads = [threading.Thread(target=work, args=("read",)) for _ in range(readers)]
+    threads += [threading.Thread(target=work, args=("write",)) for _ in range(writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return timings, time.perf_counter() - started
+
+
+# プロファイルごとに読み書きを同時に実行し、スループット・p50/p99を比較する
+def run_profiles(user, profiles, readers=4, writers=2, requests=50):
+    results = []
+    for name, profile in profiles.items():
+        use_profile(profile)
+        journal_mode = database.get_pragmas(connection, ["journal_mode"])
+        timings, elapsed = run_mixed(user, readers, writers, requests)
+        for kind, method, path in (
+            ("read", "get", " ".join(READ_PATHS)),
+            ("write", "post", "/api/vehicles/"),
+        ):
+            result = summarize(
+                f"database.{name}.{kind}",
+                method,
+                path,
+                [latency for latency, _ in timings[kind]],
+                [],
+                [status for _, status in timings[kind]],
+                elapsed,
+            )
+            result.update(journal_mode)
+            results.append(result)
+    connections.close_all()
+    return results
@@ -0,0 +1,147 @@
+import statistics
+import time
+from dataclasses import dataclass, field
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.models import Vehicle
+
+from .data import PASSWORD
+
+
+# 計測するリクエスト（pathとdataは{i}（繰り返し回数）・{id}（Vehicleのid）を置換する）
+@dataclass
+class Scenario:
+    name: str
+    path: str
+    method: str = "get"
+    data: dict = field(default=None)
+    auth: bool = True
+
+
+# 全エンドポイントの既定シナリオ
+ENDPOINT_SCENARIOS = [
+    Scenario("vehicles.list", "/api/vehicles/"),
+    Scenario("vehicles.list.ordered", "/api/vehicles/?ordering=-release_year"),
+    Scenario("vehicles.list.filtered", "/api/vehicles/?brand=1&release_year_min=2018"),
+    Scenario("vehicles.retrieve", "/api/vehicles/{id}/"),
+    Scenario("vehicles.stats", "/api/vehicles/stats/"),
+    Scenario(
+        "vehicles.create",
+        "/api/vehicles/",
+        method="post",
+        data={
+            "vehicle_name": "BENCH {i}",
+            "release_year": 2020,
+            "price": "500.00",
+            "segment": 1,
+            "brand": 1,
+        },
+    ),
+    Scenario("segments.list", "/api/segments/"),
+    Scenario("brands.list", "/api/brands/"),
+    Scenario("profile", "/api/profile/"),
+    Scenario(
+        "auth",
+        "/api/auth/",
+        method="post",
+        data={"username": "bench0", "password": PASSWORD},
+        auth=False,
+    ),
+    Scenario(
+        "create",
+        "/api/create/",
+        method="post",
+        data={"username": "bench-new-{i}", "password": PASSWORD},
+        auth=False,
+    ),
+]
+
+
+def _format(value, context):
+    if isinstance(value, str):
+        return value.format(**context)
+    if isinstance(value, dict):
+        return {key: _format(item, context) for key, item in value.items()}
+    return value
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+# 計測結果（レイテンシはミリ秒）を集計する
+def summarize(name, method, path, latencies, queries, statuses, elapsed):
+    return {
+        "name": name,
+        "method": method.upper(),
+        "path": path,
+        "iterations": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "queries": round(statistics.fmean(queries), 2) if queries else None,
+        "statuses": sorted(set(statuses)),
+    }
+
+
+# シナリオをテストクライアントで実行し、スループット・p50/p99・クエリ数を計測する
+def run_scenario(scenario, user, iterations=50, warmup=5):
+    client = APIClient()
+    if scenario.auth:
+        client.credentials(HTTP_AUTHORIZATION=f"Token {user.auth_token.key}")
+    first = Vehicle.objects.order_by("id").values_list("id", flat=True).first()
+
+    latencies, queries, statuses = [], [], []
+    started = None
+    for i in range(-warmup, iterations):
+        context = {"i": i + warmup, "id": first}
+        path = _format(scenario.path, context)
+        data = _format(scenario.data, context)
+        if i == 0:
+            started = time.perf_counter()
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            response = getattr(client, scenario.method)(path, data, format="json")
+            latency = time.perf_counter() - start
+        if i >= 0:
+            latencies.append(latency)
+            queries.append(len(ctx.captured_queries))
+            statuses.append(response.status_code)
+    elapsed = time.perf_counter() - started
+
+    return summarize(
+        scenario.name,
+        scenario.method,
+        scenario.path,
+        latencies,
+        queries,
+        statuses,
+        elapsed,
+    )
+
+
+# 前回の結果と比較し、p50/p99がthreshold（割合）以上悪化したシナリオを返す
+def compare(baseline, results, threshold=0.2):
+    previous = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            if before[metric] and result[metric] > before[metric] * (1 + threshold):
+                regressions.append(
+                    {
+                        "name": result["name"],
+                        "metric": metric,
+                        "before": before[metric],
+                        "after": result[metric],
+                    }
+                )
+    return regressions
@@ -0,0 +1,43 @@
+import random
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+
+from api.models import Vehicle
+
+from . import data
+from .runner import Scenario, run_scenario
+
+# ユーザーの一覧（API_VEHICLE_SCOPE="user"）
+SCOPED_SCENARIOS = [
+    Scenario("scoping.vehicles.list", "/api/vehicles/"),
+    Scenario("scoping.vehicles.list.last", "/api/vehicles/?ordering=-id"),
+]
+
+
+# 計測するユーザーのVehicleはper_user件のまま、他のユーザーのVehicleをsizesの件数まで増やし、
+# テーブル全体の件数ごとにユーザーの一覧のレイテンシを計測する
+def run_scoping(user, sizes, per_user=100, iterations=50, warmup=5, seed=0):
+    rng = random.Random(seed)
+    others = list(
+        User.objects.exclude(pk=user.pk)
+        .filter(username__startswith="bench")
+        .values_list("id", flat=True)
+    )
+    if not others:
+        raise ValueError("Scoping benchmark needs at least two users.")
+    # 計測するユーザーのVehicleをper_user件にそろえる
+    Vehicle.objects.filter(user=user).delete()
+    data.add_vehicles(per_user, [user.pk], rng)
+
+    results = []
+    for size in sorted(sizes):
+        data.add_vehicles(max(0, size - Vehicle.objects.count()), others, rng)
+        with override_settings(API_VEHICLE_SCOPE="user"):
+            for scenario in SCOPED_SCENARIOS:
+                result = run_scenario(scenario, user, iterations, warmup)
+                result["name"] = f"{scenario.name}.{size}"
+                result["table_rows"] = Vehicle.objects.count()
+                result["user_rows"] = per_user
+                results.append(result)
+    return results
@@ -0,0 +1,40 @@
+import random
+
+from django.contrib.auth.models import User
+
+from api.models import Vehicle
+
+from . import data
+from .runner import Scenario, run_scenario
+
+# 全文検索（/api/vehicles/search/）
+SEARCH_SCENARIOS = [
+    # 多くの行に一致する短い前方一致
+    Scenario("search.prefix", "/api/vehicles/search/?q=pr"),
+    # 車名と番号（一致する行が少ない）
+    Scenario("search.exact", "/api/vehicles/search/?q=prius+123"),
+    # 車名・Brand名の組み合わせ
+    Scenario("search.multi", "/api/vehicles/search/?q=civic+hon"),
+    Scenario("search.offset", "/api/vehicles/search/?q=leaf&offset=900"),
+    # Brand名のみに一致する（車名の一致がなく、新しい順に読む）
+    Scenario("search.brand", "/api/vehicles/search/?q=toyota"),
+    Scenario("search.brand_offset", "/api/vehicles/search/?q=toyota&offset=5000"),
+]
+
+
+# Vehicleをsizesの件数まで増やし、テーブル全体の件数ごとに検索のレイテンシを計測する
+def run_search(user, sizes, iterations=50, warmup=5, seed=0):
+    rng = random.Random(seed)
+    user_ids = list(
+        User.objects.filter(username__startswith="bench").values_list("id", flat=True)
+    )
+
+    results = []
+    for size in sorted(sizes):
+        data.add_vehicles(max(0, size - Vehicle.objects.count()), user_ids, rng)
+        for scenario in SEARCH_SCENARIOS:
+            result = run_scenario(scenario, user, iterations, warmup)
+            result["name"] = f"{scenario.name}.{size}"
+            result["table_rows"] = Vehicle.objects.count()
+            results.append(result)
+    return results
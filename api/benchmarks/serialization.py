@@ -0,0 +1,38 @@
+import time
+
+from api.models import Vehicle
+from api.serializers import ValuesSerializer, VehicleSerializer
+
+from .runner import summarize
+
+
+# VehicleSerializer（モデルのインスタンス）とValuesSerializer（values_list()）で
+# rows件の一覧をDBから取得してシリアライズし、1秒あたりの行数を比較する
+def run_serialization(rows=1000, iterations=20, warmup=2):
+    queryset = Vehicle.objects.select_related("segment", "brand").order_by("id")
+    values_serializer = ValuesSerializer(VehicleSerializer())
+
+    def serialize_instances():
+        return VehicleSerializer(queryset[:rows], many=True).data
+
+    def serialize_values():
+        return values_serializer.to_representation(
+            values_serializer.get_rows(queryset)[:rows]
+        )
+
+    results = []
+    for name, serialize in (
+        ("serialization.vehicles.serializer", serialize_instances),
+        ("serialization.vehicles.values", serialize_values),
+    ):
+        latencies = []
+        for i in range(-warmup, iterations):
+            start = time.perf_counter()
+            count = len(serialize())
+            if i >= 0:
+                latencies.append(time.perf_counter() - start)
+        result = summarize(name, "get", "", latencies, [], [], sum(latencies))
+        result["rows"] = count
+        result["rows_per_second"] = round(count * len(latencies) / sum(latencies))
+        results.append(result)
+    return results
@@ -0,0 +1,84 @@
+import hashlib
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+# ヒット・ミス・無効化の回数（プロセス内のカウンタ）
+_stats = defaultdict(lambda: {"hits": 0, "misses": 0, "invalidations": 0})
+_stats_lock = threading.Lock()
+
+
+def get_options():
+    options = {"ALIAS": "default", "TIMEOUT": 300}
+    options.update(getattr(settings, "API_RESPONSE_CACHE", {}))
+    return options
+
+
+def get_cache():
+    return caches[get_options()["ALIAS"]]
+
+
+def record(resource, name):
+    with _stats_lock:
+        _stats[resource][name] += 1
+
+
+# 監視用にリソースごとのカウンタを返す
+def cache_stats():
+    with _stats_lock:
+        return {resource: dict(counts) for resource, counts in _stats.items()}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+# リソースの世代番号（無効化のたびに進めて古いキーを参照されなくする）
+def get_version(resource):
+    cache = get_cache()
+    key = f"api:{resource}:version"
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+def _bump_version(resource):
+    cache = get_cache()
+    key = f"api:{resource}:version"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, timeout=None)
+
+
+# リソースのキャッシュを無効化する
+# コミット前に古いデータがキャッシュされないよう、コミット後にも世代を進める
+def invalidate(resource):
+    _bump_version(resource)
+    transaction.on_commit(lambda: _bump_version(resource))
+    record(resource, "invalidations")
+
+
+# URL（クエリ文字列・ホストを含む）と世代番号からキャッシュキーを作成する
+def make_key(resource, request):
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f"api:{resource}:v{get_version(resource)}:{url}"
+
+
+# キャッシュにあればその値を、なければcomputeの結果を保存して返す
+def get_or_compute(resource, key, compute):
+    cache = get_cache()
+    data = cache.get(key)
+    if data is not None:
+        record(resource, "hits")
+        return data
+    record(resource, "misses")
+    data = compute()
+    cache.set(key, data, get_options()["TIMEOUT"])
+    return data
@@ -0,0 +1,80 @@
+import gzip
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def get_options():
+    options = {
+        "MIN_SIZE": 1024,
+        "GZIP_LEVEL": 6,
+        "BROTLI_QUALITY": 5,
+        "ZSTD_LEVEL": 3,
+        "CONTENT_TYPES": ["application/json", "application/vnd.columnar+json"],
+    }
+    options.update(getattr(settings, "API_COMPRESSION", {}))
+    return options
+
+
+def _gzip(content, options):
+    # mtime=0: 同じ内容なら同じバイト列になるようにする
+    return gzip.compress(content, compresslevel=options["GZIP_LEVEL"], mtime=0)
+
+
+def _brotli(content, options):
+    return brotli.compress(content, quality=options["BROTLI_QUALITY"])
+
+
+def _zstd(content, options):
+    return zstandard.ZstdCompressor(level=options["ZSTD_LEVEL"]).compress(content)
+
+
+# 利用できる圧縮方式（クライアントが同じ優先度で受け付ける場合は先のものを選ぶ）
+ENCODINGS = {"gzip": _gzip}
+if zstandard is not None:
+    ENCODINGS = {"zstd": _zstd, **ENCODINGS}
+if brotli is not None:
+    ENCODINGS = {"br": _brotli, **ENCODINGS}
+
+
+# Accept-Encodingのq値を解析する（{"gzip": 1.0, "br": 0.5, ...}）
+def parse_accept_encoding(header):
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+# クライアントが受け付ける圧縮方式のうちq値が最も高いものを返す（なければNone）
+def negotiate(header):
+    accepted = parse_accept_encoding(header or "")
+    default = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = accepted.get(encoding, default)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(encoding, content):
+    return ENCODINGS[encoding](content, get_options())
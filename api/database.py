@@ -0,0 +1,36 @@
+import re
+import sqlite3
+from contextlib import closing
+
+# PRAGMAの値として許可する形式（数値・キーワード）
+_VALUE = re.compile(r"^-?\w+$")
+
+
+# 接続時にsettings.DATABASESの"PRAGMAS"を実行する（SQLiteのみ）
+def apply_pragmas(connection):
+    if connection.vendor != "sqlite":
+        return
+    pragmas = connection.settings_dict.get("PRAGMAS") or {}
+    for name, value in pragmas.items():
+        if not (name.isidentifier() and _VALUE.match(str(value))):
+            raise ValueError(f"Invalid PRAGMA {name}={value!r}")
+        # クエリの計測・ログの対象外にするため、DB-APIの接続で直接実行する
+        connection.connection.execute(f"PRAGMA {name} = {value}")
+
+
+# 接続に適用されているPRAGMAの値を返す
+def get_pragmas(connection, names):
+    with connection.cursor() as cursor:
+        values = {}
+        for name in names:
+            cursor.execute(f"PRAGMA {name}")
+            values[name] = cursor.fetchone()[0]
+    return values
+
+
+# SQLiteのオンラインバックアップでsourceのファイルの内容をtargetに複製する
+# （書き込み中のsourceからも一貫した状態を複製できる）
+def copy_sqlite(source, target):
+    with closing(sqlite3.connect(source)) as src:
+        with closing(sqlite3.connect(target)) as dst:
+            src.backup(dst)
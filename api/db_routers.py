@@ -0,0 +1,62 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# レプリカから読み取るアプリ（認証などはレプリカの遅れの影響を受けないようプライマリから読む）
+REPLICA_APPS = {"api"}
+
+# 処理中のリクエストをプライマリに固定するか（ReplicaPinningMiddlewareが設定する）
+_pinned = ContextVar("api_replica_pinned", default=False)
+
+
+def get_replicas():
+    return list(getattr(settings, "API_DATABASE_REPLICAS", []))
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+def pin(value=True):
+    return _pinned.set(value)
+
+
+def unpin(token):
+    _pinned.reset(token)
+
+
+# ブロック内の読み取りをプライマリに固定する
+@contextmanager
+def use_primary():
+    token = pin()
+    try:
+        yield
+    finally:
+        unpin(token)
+
+
+# 読み取りをレプリカ（複数ある場合はランダム）に、書き込みをプライマリに振り分ける
+# 書き込みを行ったリクエスト・クライアントは自分の書き込みを読めるようプライマリから読む
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        replicas = get_replicas()
+        if not replicas or is_pinned() or model._meta.app_label not in REPLICA_APPS:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    # プライマリとレプリカは同じデータなので、どの組み合わせでも関連を許可する
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    # レプリカにはマイグレーションせず、sync_replicaでプライマリから複製する
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in get_replicas()
@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+
+from . import versions
+from .models import Brand, Segment, Vehicle
+
+# 名前をVehicleにコピーするモデル → (Vehicleの外部キー, 名前の列)
+# 名前の列はコピー元・コピー先（Vehicle）で同じ名前
+NAME_FIELDS = {Segment: ("segment", "segment_name"), Brand: ("brand", "brand_name")}
+
+
+# 読み取り（一覧・詳細・集計）でVehicleのコピー列を使うか（JOINしない）
+def is_enabled():
+    return getattr(settings, "API_VEHICLE_DENORMALIZED_NAMES", False)
+
+
+# 保存前のVehicleに関連先の名前をコピーする（更新した列を返す）
+def copy_names(vehicle):
+    changed = []
+    for foreign_key, column in NAME_FIELDS.values():
+        name = getattr(getattr(vehicle, foreign_key), column)
+        if getattr(vehicle, column) != name:
+            setattr(vehicle, column, name)
+            changed.append(column)
+    return changed
+
+
+# 関連先の名前を参照する相関サブクエリ（UPDATE ... SET segment_name = (SELECT ...)）
+def name_subquery(model):
+    foreign_key, column = NAME_FIELDS[model]
+    return Subquery(
+        model.objects.filter(pk=OuterRef(f"{foreign_key}_id")).values(column)[:1]
+    )
+
+
+# 名前を変更したSegment/Brandのコピーを1回のUPDATEで更新する（更新した件数を返す）
+# 外部キーのインデックスで対象のVehicleのみを読み、名前が同じ行は書き込まない
+def propagate(instance):
+    foreign_key, column = NAME_FIELDS[type(instance)]
+    name = getattr(instance, column)
+    return (
+        Vehicle.objects.filter(**{foreign_key: instance})
+        .exclude(**{column: name})
+        .update(**{column: name})
+    )
+
+
+# 複数のSegment/Brandのコピーを1回のUPDATEで更新する（一括更新用）
+def propagate_many(model, pks):
+    foreign_key, column = NAME_FIELDS[model]
+    return Vehicle.objects.filter(**{f"{foreign_key}__in": pks}).update(
+        **{column: name_subquery(model)}
+    )
+
+
+# 既存のVehicleにコピー列を反映する（idの範囲ごとにUPDATEし、範囲ごとにコミットする）
+# 書き込みのロックを短くするため1回の件数はbatch_sizeまで、進捗として累計件数をyieldする
+def backfill(batch_size=5000, missing_only=False):
+    queryset = Vehicle.objects.order_by("pk")
+    if missing_only:
+        queryset = queryset.filter(
+            Q(segment_name__isnull=True) | Q(brand_name__isnull=True)
+        )
+    values = {
+        column: name_subquery(model) for model, (_, column) in NAME_FIELDS.items()
+    }
+
+    last_pk, total = 0, 0
+    while True:
+        pks = list(
+            queryset.filter(pk__gt=last_pk).values_list("pk", flat=True)[:batch_size]
+        )
+        if not pks:
+            # QuerySet.update()はシグナルを送らないため、ETag・集計のキャッシュ用のバージョンを進める
+            if total:
+                versions.bump(Vehicle)
+            return
+        with transaction.atomic():
+            total += Vehicle.objects.filter(pk__gte=pks[0], pk__lte=pks[-1]).update(
+                **values
+            )
+        last_pk = pks[-1]
+        yield total
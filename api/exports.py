@@ -0,0 +1,67 @@
+import csv
+
+from rest_framework.serializers import BaseSerializer
+from rest_framework.utils.encoders import JSONEncoder
+
+# エクスポート形式ごとのContent-Typeと拡張子
+EXPORT_TYPES = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+}
+
+
+# csv.writerの書き込み先（書き込んだ文字列をそのまま返す）
+class Echo:
+    def write(self, value):
+        return value
+
+
+# 1行1JSONの形式でchunk_size行ずつまとめて返す
+def stream_ndjson(rows, chunk_size):
+    encoder = JSONEncoder(ensure_ascii=False)
+    buffer = []
+    for row in rows:
+        buffer.append(encoder.encode(row))
+        if len(buffer) >= chunk_size:
+            yield "\n".join(buffer) + "\n"
+            buffer = []
+    if buffer:
+        yield "\n".join(buffer) + "\n"
+
+
+# CSVの列名（埋め込んだオブジェクト（?expand=）はsegment.idのように関連先のフィールドごとの列にする）
+def get_csv_columns(fields):
+    columns = []
+    for name, field in fields.items():
+        if isinstance(field, BaseSerializer):
+            columns += [f"{name}.{child}" for child in field.fields]
+        else:
+            columns.append(name)
+    return columns
+
+
+def get_csv_value(row, column):
+    name, _, child = column.partition(".")
+    value = row.get(name)
+    if child and value is not None:
+        return value.get(child)
+    return value
+
+
+# ヘッダー行付きのCSVをchunk_size行ずつまとめて返す
+def stream_csv(rows, fields, chunk_size):
+    writer = csv.writer(Echo())
+    buffer = [writer.writerow(fields)]
+    for row in rows:
+        buffer.append(writer.writerow([get_csv_value(row, field) for field in fields]))
+        if len(buffer) >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+def stream_rows(export_type, rows, fields, chunk_size):
+    if export_type == "csv":
+        return stream_csv(rows, fields, chunk_size)
+    return stream_ndjson(rows, chunk_size)
@@ -0,0 +1,74 @@
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+# クエリパラメータ → (絞り込み条件, 値のバリデーション用フィールド)
+VEHICLE_FILTERS = {
+    "segment": ("segment_id", serializers.IntegerField()),
+    "brand": ("brand_id", serializers.IntegerField()),
+    "user": ("user_id", serializers.IntegerField()),
+    "release_year_min": ("release_year__gte", serializers.IntegerField()),
+    "release_year_max": ("release_year__lte", serializers.IntegerField()),
+    "price_min": (
+        "price__gte",
+        serializers.DecimalField(max_digits=8, decimal_places=2),
+    ),
+    "price_max": (
+        "price__lte",
+        serializers.DecimalField(max_digits=8, decimal_places=2),
+    ),
+}
+
+
+# Vehicleの等価・範囲での絞り込み
+# 例: /api/vehicles/?brand=1&segment=2&release_year_min=2018&release_year_max=2022&price_max=400
+class VehicleFilter(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        conditions, errors = {}, {}
+        for param, (lookup, field) in VEHICLE_FILTERS.items():
+            value = request.query_params.get(param)
+            if value in (None, ""):
+                continue
+            try:
+                conditions[lookup] = field.run_validation(value)
+            except serializers.ValidationError as exc:
+                errors[param] = exc.detail
+        if errors:
+            raise serializers.ValidationError(errors)
+        return queryset.filter(**conditions)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": param,
+                "required": False,
+                "in": "query",
+                "schema": {"type": "integer" if lookup.endswith("_id") else "number"},
+            }
+            for param, (lookup, _) in VEHICLE_FILTERS.items()
+        ]
+
+
+# インデックスのある列のみ並び替えを許可する（?ordering=-release_year）
+# 許可されていない列を指定した場合は400を返す
+class IndexedOrderingFilter(OrderingFilter):
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if not params:
+            return self.get_default_ordering(view)
+
+        allowed = view.ordering_fields
+        ordering = []
+        for term in (param.strip() for param in params.split(",")):
+            # 降順の"-"は先頭の1文字のみ（"--price"などは許可しない）
+            descending = term.startswith("-")
+            name = term[1:] if descending else term
+            if name not in allowed:
+                raise serializers.ValidationError(
+                    {self.ordering_param: [f"Choose from: {', '.join(allowed)}"]}
+                )
+            ordering.append(f"-{allowed[name]}" if descending else allowed[name])
+        # 同じ値の行の順序を固定するため最後にidを追加
+        # （先頭の列と向きを揃えてインデックスを逆順に走査できるようにする）
+        if "id" not in (term.removeprefix("-") for term in ordering):
+            ordering.append("-id" if ordering[0].startswith("-") else "id")
+        return ordering
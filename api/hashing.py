@@ -0,0 +1,73 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from . import metrics
+
+
+# ハッシュ処理の待ちが上限に達した場合（wait: 再試行までの秒数）
+# 管理画面のログインなどDRF以外のビューからも送出されるため、DRFの例外にせず
+# LoadSheddingMiddlewareで503とRetry-Afterに変換する
+class HashingBusy(Exception):
+    detail = "Too many login or signup requests. Please retry later."
+
+    def __init__(self, wait):
+        super().__init__(self.detail)
+        self.wait = wait
+
+
+# パスワードのハッシュ計算を行うスレッドプール
+# 同時に計算するのはworkers件、待機はqueue_size件までとし、それ以上は待たずにHashingBusyを返す
+# （ログインが集中してもリクエストを処理するスレッドがハッシュ計算の待ちで埋まらないようにする）
+class HashingPool:
+    def __init__(self, workers=2, queue_size=16, retry_after=1):
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="api-hashing"
+        )
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy(self.retry_after)
+        try:
+            with metrics.timed("hashing"):
+                return self._executor.submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+
+def _create_pool():
+    options = {"WORKERS": 2, "QUEUE_SIZE": 16, "RETRY_AFTER": 1}
+    options.update(getattr(settings, "API_PASSWORD_HASHING", {}))
+    return HashingPool(
+        workers=options["WORKERS"],
+        queue_size=options["QUEUE_SIZE"],
+        retry_after=options["RETRY_AFTER"],
+    )
+
+
+pool = _create_pool()
+
+
+# 優先するハッシュ方式（PASSWORD_HASHERSの先頭）でハッシュ化する
+def make_password(password):
+    return pool.run(hashers.make_password, password)
+
+
+def _verify(password, encoded):
+    upgrade = []
+    is_correct = hashers.check_password(password, encoded, setter=upgrade.append)
+    return is_correct, bool(upgrade)
+
+
+# パスワードを検証し、古いハッシュ方式・設定の場合は優先する方式でハッシュ化し直して保存する
+# （DBへの保存はリクエストのスレッドで行う）
+def check_password(user, password):
+    is_correct, must_update = pool.run(_verify, password, user.password)
+    if is_correct and must_update:
+        user.password = make_password(password)
+        user.save(update_fields=["password"])
+    return is_correct
@@ -0,0 +1,145 @@
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.http.request import RawPostDataException
+from rest_framework import exceptions, serializers, status
+from rest_framework.response import Response
+
+from .lru import LRUCache
+
+# 再送時に保存したレスポンスを返したことを示すヘッダー
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def get_options():
+    options = {
+        "HEADER": "Idempotency-Key",
+        "MAX_KEY_LENGTH": 255,
+        "MAX_SIZE": 10000,
+        "TTL": 86400,
+        "LOCK_TIMEOUT": 10,
+    }
+    options.update(getattr(settings, "API_IDEMPOTENCY", {}))
+    return options
+
+
+# 同じキーで異なる内容のリクエストが送られた場合（422）
+class IdempotencyKeyMismatch(exceptions.APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "This Idempotency-Key was used with a different request."
+    default_code = "idempotency_key_mismatch"
+
+
+# 同じキーのリクエストが処理中のまま待ち時間を過ぎた場合（409、Retry-Afterで再試行までの秒数を返す）
+class IdempotencyKeyInProgress(exceptions.APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with this Idempotency-Key is still in progress."
+    default_code = "idempotency_key_in_progress"
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = wait
+
+
+# キーごとのロック（同じキーの同時リクエストを1件ずつ処理する）
+# 待っているリクエストがなくなったロックは削除する
+class KeyLocks:
+    def __init__(self):
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, key, timeout):
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        acquired = entry[0].acquire(timeout=timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                entry[0].release()
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+    def __len__(self):
+        return len(self._locks)
+
+
+def _create_store():
+    options = get_options()
+    return LRUCache(max_size=options["MAX_SIZE"], ttl=options["TTL"])
+
+
+# キー → 最初のレスポンス（件数上限とTTLで削除）
+# プロセスごとに保持するため、複数プロセスで動かす場合は同じプロセスへの再送のみ重複を防げる
+store = _create_store()
+locks = KeyLocks()
+
+
+# リクエストの内容（同じキーで異なる内容が送られていないかの確認用）
+def fingerprint(request):
+    try:
+        body = request.body
+    except RawPostDataException:
+        # フォームなど、既にストリームから読み込まれている場合
+        body = repr(sorted(request.data.lists())).encode()
+    return hashlib.sha256(body).hexdigest()
+
+
+# Idempotency-Keyヘッダーを付けたリクエストはhandler()のレスポンスを保存し、
+# 同じキーの再送にはhandlerを呼ばずに（バリデーション・登録を行わずに）保存したレスポンスを返す
+# 同じキーの同時リクエストはロックで待たせ、書き込みは最初の1件だけ行う
+# 5xx・例外（バリデーションエラーなど）は保存しないため、再送時にもう一度処理する
+def run(request, handler):
+    options = get_options()
+    key = request.headers.get(options["HEADER"])
+    if key is None:
+        return handler()
+    if not key or len(key) > options["MAX_KEY_LENGTH"]:
+        raise serializers.ValidationError(
+            {
+                options["HEADER"]: [
+                    f"Must be 1 to {options['MAX_KEY_LENGTH']} characters."
+                ]
+            }
+        )
+
+    # ユーザー・エンドポイントごとのキー（他のユーザーのレスポンスは返さない）
+    user_id = request.user.pk if request.user.is_authenticated else ""
+    key = f"{user_id}:{request.method}:{request.path}:{key}"
+    request_fingerprint = fingerprint(request)
+    with locks.hold(key, options["LOCK_TIMEOUT"]) as acquired:
+        if not acquired:
+            raise IdempotencyKeyInProgress(options["LOCK_TIMEOUT"])
+        saved = store.get(key)
+        if saved is not None:
+            if saved["fingerprint"] != request_fingerprint:
+                raise IdempotencyKeyMismatch()
+            response = Response(saved["data"], status=saved["status"])
+            for name, value in saved["headers"].items():
+                response[name] = value
+            response[REPLAYED_HEADER] = "true"
+            return response
+
+        response = handler()
+        if response.status_code < 500:
+            store.set(
+                key,
+                {
+                    "fingerprint": request_fingerprint,
+                    "status": response.status_code,
+                    "data": response.data,
+                    # Content-Typeは出力時に決まるため保存しない
+                    "headers": {
+                        name: value
+                        for name, value in response.items()
+                        if name.lower() != "content-type"
+                    },
+                },
+            )
+        return response
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import denormalize
+
+
+# 既存のVehicleにSegment・Brandの名前（segment_name/brand_name）をコピーする
+# マイグレーション0004の適用後、API_VEHICLE_DENORMALIZED_NAMESを有効にする前に実行する
+# python manage.py backfill_vehicle_names --batch-size 5000
+class Command(BaseCommand):
+    help = "Copy segment and brand names into the denormalized Vehicle columns."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows updated per transaction (default: 5000).",
+        )
+        parser.add_argument(
+            "--missing-only",
+            action="store_true",
+            help="Only update rows whose names have not been copied yet.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        total = 0
+        for total in denormalize.backfill(
+            options["batch_size"], missing_only=options["missing_only"]
+        ):
+            self.stdout.write(f"Updated {total} vehicles")
+        self.stdout.write(self.style.SUCCESS(f"Done ({total} vehicles)"))
@@ -0,0 +1,302 @@
+import json
+import os
+import platform
+import tempfile
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from api import cache as response_cache
+from api.authentication import token_cache
+from api.benchmarks import (
+    concurrency,
+    data,
+    database,
+    runner,
+    scoping,
+    search,
+    serialization,
+)
+
+
+# テスト用DBにデータを作成し、各エンドポイントのスループット・p50/p99・クエリ数を計測する
+# python manage.py benchmark --vehicles 100000 --output results.json [--compare baseline.json]
+# --suite concurrencyで同期・非同期の読み取りAPIを同時接続数を指定して比較する
+# --suite databaseでファイルのDBに同時に読み書きし、接続設定のプロファイルを比較する
+# --suite serializationでVehicleの一覧のシリアライズ（モデル/values_list）を行数/秒で比較する
+# --suite scopingでテーブル全体の件数（--sizes）ごとにユーザーの一覧のレイテンシを計測する
+# --suite searchでテーブル全体の件数（--sizes）ごとに全文検索のレイテンシを計測する
+class Command(BaseCommand):
+    help = "Benchmark API endpoints in-process against a seeded test database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vehicles", type=int, default=1000)
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--segments", type=int, default=7)
+        parser.add_argument("--brands", type=int, default=7)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            default=[],
+            help="Only run scenarios whose name starts with this (repeatable).",
+        )
+        parser.add_argument(
+            "--suite",
+            choices=[
+                "endpoints",
+                "concurrency",
+                "database",
+                "serialization",
+                "scoping",
+                "search",
+            ],
+            default="endpoints",
+            help="endpoints: each endpoint sequentially; "
+            "concurrency: sync vs async read views under concurrent load; "
+            "database: concurrent reads/writes per API_DATABASE_PROFILES entry; "
+            "serialization: VehicleSerializer vs values_list() rows/second; "
+            "scoping: per-user vehicle listing as the table grows; "
+            "search: full-text vehicle search as the table grows.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Concurrent requests in flight (concurrency suite).",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=4,
+            help="Worker threads serving the sync views (concurrency suite).",
+        )
+        parser.add_argument(
+            "--sizes",
+            type=lambda value: [int(size) for size in value.split(",")],
+            default=[10000, 100000],
+            help="Comma-separated total vehicle counts (scoping/search suites).",
+        )
+        parser.add_argument(
+            "--per-user",
+            type=int,
+            default=100,
+            help="Vehicles owned by the measured user (scoping suite).",
+        )
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=1000,
+            help="Rows serialized per iteration (serialization suite).",
+        )
+        parser.add_argument(
+            "--readers",
+            type=int,
+            default=4,
+            help="Threads reading vehicles (database suite).",
+        )
+        parser.add_argument(
+            "--writers",
+            type=int,
+            default=2,
+            help="Threads creating vehicles (database suite).",
+        )
+        parser.add_argument(
+            "--profile",
+            action="append",
+            default=[],
+            help="Database profile to compare (repeatable, database suite).",
+        )
+        parser.add_argument(
+            "--file-db",
+            action="store_true",
+            help="Use an on-disk test database instead of an in-memory one "
+            "(always on for the database suite).",
+        )
+        parser.add_argument("--output", help="Write results as JSON to this file.")
+        parser.add_argument("--compare", help="Baseline JSON file to compare with.")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Relative p50/p99 slowdown reported as a regression.",
+        )
+
+    def handle(self, *args, **options):
+        baseline = self.load(options["compare"]) if options["compare"] else None
+        scenarios = [
+            scenario
+            for scenario in runner.ENDPOINT_SCENARIOS
+            if not options["scenario"]
+            or any(scenario.name.startswith(name) for name in options["scenario"])
+        ]
+        if options["suite"] == "endpoints" and not scenarios:
+            raise CommandError("No scenario matched.")
+        profiles = self.get_profiles(options["profile"])
+
+        setup_test_environment()
+        # 同じクライアントから繰り返し送るため、リクエスト数の制限・過負荷時の503は無効にして計測する
+        limits = override_settings(
+            API_THROTTLE={**getattr(settings, "API_THROTTLE", {}), "ENABLED": False},
+            API_LOAD_SHEDDING={
+                **getattr(settings, "API_LOAD_SHEDDING", {}),
+                "MAX_IN_FLIGHT": float("inf"),
+            },
+        )
+        limits.enable()
+        if options["suite"] == "database" or options["file_db"]:
+            tmpdir = tempfile.TemporaryDirectory()
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(
+                tmpdir.name, "benchmark.sqlite3"
+            )
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            response_cache.get_cache().clear()
+            token_cache.clear()
+            self.stdout.write(f"Seeding {options['vehicles']} vehicles...")
+            users = data.seed(
+                users=options["users"],
+                segments=options["segments"],
+                brands=options["brands"],
+                vehicles=options["vehicles"],
+                seed=options["seed"],
+            )
+            if options["suite"] == "scoping":
+                results = scoping.run_scoping(
+                    users[0],
+                    options["sizes"],
+                    per_user=options["per_user"],
+                    iterations=options["iterations"],
+                    warmup=options["warmup"],
+                    seed=options["seed"],
+                )
+            elif options["suite"] == "search":
+                results = search.run_search(
+                    users[0],
+                    options["sizes"],
+                    iterations=options["iterations"],
+                    warmup=options["warmup"],
+                    seed=options["seed"],
+                )
+            elif options["suite"] == "serialization":
+                results = serialization.run_serialization(
+                    rows=min(options["vehicles"], options["rows"]),
+                    iterations=options["iterations"],
+                    warmup=options["warmup"],
+                )
+            elif options["suite"] == "database":
+                results = database.run_profiles(
+                    users[0],
+                    profiles,
+                    readers=options["readers"],
+                    writers=options["writers"],
+                    requests=options["iterations"],
+                )
+            elif options["suite"] == "concurrency":
+                results = concurrency.run_concurrency(
+                    users[0],
+                    requests=options["iterations"],
+                    concurrency=options["concurrency"],
+                    threads=options["threads"],
+                    names=options["scenario"],
+                )
+            else:
+                results = [
+                    runner.run_scenario(
+                        scenario,
+                        users[0],
+                        iterations=options["iterations"],
+                        warmup=options["warmup"],
+                    )
+                    for scenario in scenarios
+                ]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            limits.disable()
+            teardown_test_environment()
+
+        report = {"meta": self.meta(options), "results": results}
+        self.print_results(results)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if baseline:
+            self.print_regressions(
+                runner.compare(baseline, report, options["threshold"])
+            )
+
+    def meta(self, options):
+        keys = (
+            "suite",
+            "vehicles",
+            "users",
+            "segments",
+            "brands",
+            "seed",
+            "iterations",
+            "concurrency",
+            "threads",
+            "readers",
+            "writers",
+            "rows",
+            "sizes",
+            "per_user",
+        )
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            **{key: options[key] for key in keys},
+        }
+
+    def get_profiles(self, names):
+        profiles = getattr(settings, "API_DATABASE_PROFILES", {"default": {}})
+        unknown = set(names) - set(profiles)
+        if unknown:
+            raise CommandError(f"Unknown database profile: {', '.join(unknown)}")
+        return {name: profiles[name] for name in names or profiles}
+
+    def load(self, path):
+        try:
+            with open(path) as file:
+                return json.load(file)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read baseline {path}: {exc}")
+
+    def print_results(self, results):
+        header = (
+            f"{'scenario':<34}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}{'queries':>9}"
+        )
+        self.stdout.write(header)
+        for result in results:
+            self.stdout.write(
+                f"{result['name']:<34}{result['throughput_rps']:>10}"
+                f"{result['p50_ms']:>10}{result['p99_ms']:>10}"
+                f"{'-' if result['queries'] is None else result['queries']:>9}"
+            )
+
+    def print_regressions(self, regressions):
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regressions."))
+            return
+        for regression in regressions:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"{regression['name']} {regression['metric']}: "
+                    f"{regression['before']} -> {regression['after']}"
+                )
+            )
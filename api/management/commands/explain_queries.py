@@ -0,0 +1,114 @@
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import Vehicle
+
+# 既定で実行計画を確認するエンドポイント（{id}は先頭のVehicleのidに置換）
+DEFAULT_PATHS = [
+    "/api/vehicles/",
+    "/api/vehicles/{id}/",
+    "/api/vehicles/?brand=1&release_year_min=2018&release_year_max=2022&ordering=release_year",
+    "/api/vehicles/?segment=1&ordering=-release_year",
+    "/api/vehicles/?price_max=400&ordering=price",
+    "/api/vehicles/?user=1",
+    "/api/vehicles/?ordering=vehicle_name",
+]
+
+
+# ビューセットが実際に発行するSQLを取得し、EXPLAIN QUERY PLANでフルスキャンを検出する
+# python manage.py explain_queries [path ...] [--fail-on-scan]
+class Command(BaseCommand):
+    help = "Run EXPLAIN QUERY PLAN on the SQL issued by API endpoints and flag full table scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", help="API paths to explain (GET).")
+        parser.add_argument("--username", help="User to authenticate as.")
+        parser.add_argument(
+            "--fail-on-scan",
+            action="store_true",
+            help="Exit with an error when a full table scan or temp sort is found.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("EXPLAIN QUERY PLAN is only supported on SQLite.")
+
+        user = self.get_user(options["username"])
+        first = Vehicle.objects.order_by("id").values_list("id", flat=True).first()
+        paths = options["paths"] or [
+            path.format(id=first)
+            for path in DEFAULT_PATHS
+            if first or "{id}" not in path
+        ]
+
+        problems = 0
+        for path in paths:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"GET {path}"))
+            for sql in self.capture_queries(path, user):
+                problems += self.explain(sql)
+
+        if problems and options["fail_on_scan"]:
+            raise CommandError(f"{problems} full table scan(s) or temp sort(s) found.")
+
+    def get_user(self, username):
+        users = User.objects.order_by("id")
+        user = users.filter(username=username).first() if username else users.first()
+        if user is None:
+            raise CommandError("No user found to authenticate as.")
+        return user
+
+    # ALLOWED_HOSTSで許可されているホスト名（未設定の場合はDEBUG時に許可されるlocalhost）
+    def get_host(self):
+        hosts = [host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"]
+        return hosts[0] if hosts else "localhost"
+
+    # エンドポイントをテストリクエストで実行し、発行されたSELECT文を返す
+    def capture_queries(self, path, user):
+        request = APIRequestFactory().get(path, HTTP_HOST=self.get_host())
+        force_authenticate(request, user=user)
+        match = resolve(urlsplit(path).path)
+        with CaptureQueriesContext(connection) as ctx:
+            response = match.func(request, *match.args, **match.kwargs)
+            response.render()
+        if response.status_code >= 400:
+            self.stdout.write(self.style.WARNING(f"  status {response.status_code}"))
+        return [
+            query["sql"]
+            for query in ctx.captured_queries
+            if query["sql"].lstrip().upper().startswith("SELECT")
+        ]
+
+    # 実行計画を表示し、フルスキャン・一時B-Treeでのソートの数を返す
+    # 絞り込みのないLIMIT付きのクエリで、最初に読むテーブルをソートせずに走査する場合は
+    # rowid（id）の順にLIMIT件だけ読んで止まるため、問題として数えない（最適な実行計画）
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            plan = [row[-1] for row in cursor.fetchall()]
+
+        upper = sql.upper()
+        bounded = (
+            " LIMIT " in upper
+            and " WHERE " not in upper
+            and not any("USE TEMP B-TREE" in detail for detail in plan)
+        )
+        self.stdout.write(f"  {sql}")
+        problems = 0
+        for index, detail in enumerate(plan):
+            full_scan = detail.startswith("SCAN ") and " USING " not in detail
+            temp_sort = "USE TEMP B-TREE" in detail
+            if full_scan and bounded and index == 0:
+                self.stdout.write(f"      {detail} (bounded by LIMIT, id order)")
+            elif full_scan or temp_sort:
+                problems += 1
+                self.stdout.write(self.style.ERROR(f"    ! {detail}"))
+            else:
+                self.stdout.write(f"      {detail}")
+        return problems
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from api import database
+from api.db_routers import get_replicas
+
+
+# プライマリ（default）のSQLiteファイルをレプリカに複製する（ローカルでの検証用）
+# API_DATABASE_REPLICA=replica.sqlite3 python manage.py sync_replica
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database to the replica aliases."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "aliases",
+            nargs="*",
+            help="Replica aliases to sync (default: API_DATABASE_REPLICAS).",
+        )
+
+    def handle(self, *args, **options):
+        aliases = options["aliases"] or get_replicas()
+        if not aliases:
+            raise CommandError("No replica is configured (API_DATABASE_REPLICAS).")
+        unknown = set(aliases) - set(get_replicas())
+        if unknown:
+            raise CommandError(f"Not a replica: {', '.join(sorted(unknown))}")
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        for alias in [DEFAULT_DB_ALIAS, *aliases]:
+            if connections[alias].vendor != "sqlite":
+                raise CommandError(f"{alias} is not a SQLite database.")
+        for alias in aliases:
+            replica = connections[alias]
+            # 複製中にレプリカの古い接続が残らないよう閉じておく
+            replica.close()
+            database.copy_sqlite(
+                primary.settings_dict["NAME"], replica.settings_dict["NAME"]
+            )
+            self.stdout.write(
+                f"Copied {primary.settings_dict['NAME']} to {alias} "
+                f"({replica.settings_dict['NAME']})"
+            )
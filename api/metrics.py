@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from . import cache as response_cache
+
+# レイテンシのヒストグラムの境界値[秒]
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 処理中のリクエストの計測値
+_current = ContextVar("api_request_timings", default=None)
+
+
+# 1リクエスト分の計測値（区間ごとの時間とSQLの回数）
+class RequestTimings:
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.queries = 0
+        self._active = set()
+
+    # connection.execute_wrapperに渡してSQLの回数と時間を計測する
+    def sql_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.durations["db"] += time.perf_counter() - start
+
+
+def start_request():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+# 区間の時間を計測して処理中のリクエストに加算する（入れ子の同名区間は外側のみ計測）
+@contextmanager
+def timed(name):
+    timings = _current.get()
+    if timings is None or name in timings._active:
+        yield
+        return
+    timings._active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.durations[name] += time.perf_counter() - start
+        timings._active.discard(name)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+# プロセス内のメトリクス（ルート名ごと）
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = defaultdict(int)
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.totals = defaultdict(lambda: defaultdict(float))
+
+    def observe(self, route, method, status, duration, timings, size):
+        with self._lock:
+            self.requests[(route, method, status)] += 1
+            self.latency[(route, method)].observe(duration)
+            totals = self.totals[route]
+            totals["sql_queries"] += timings.queries
+            totals["response_bytes"] += size
+            for name, seconds in timings.durations.items():
+                totals[f"{name}_seconds"] += seconds
+
+    # Prometheusのテキスト形式で出力する
+    def render_prometheus(self):
+        lines = []
+        with self._lock:
+            lines += [
+                "# HELP api_requests_total Requests by route, method and status.",
+                "# TYPE api_requests_total counter",
+            ]
+            for (route, method, status), count in sorted(self.requests.items()):
+                labels = _labels(route=route, method=method, status=status)
+                lines.append(f"api_requests_total{{{labels}}} {count}")
+
+            lines += [
+                "# HELP api_request_duration_seconds Request latency by route.",
+                "# TYPE api_request_duration_seconds histogram",
+            ]
+            for (route, method), histogram in sorted(self.latency.items()):
+                labels = _labels(route=route, method=method)
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(
+                        f'api_request_duration_seconds_bucket{{{labels},le="{bound}"}}'
+                        f" {count}"
+                    )
+                lines += [
+                    f'api_request_duration_seconds_bucket{{{labels},le="+Inf"}}'
+                    f" {histogram.count}",
+                    f"api_request_duration_seconds_sum{{{labels}}} {histogram.sum}",
+                    f"api_request_duration_seconds_count{{{labels}}} {histogram.count}",
+                ]
+
+            names = sorted({name for totals in self.totals.values() for name in totals})
+            for name in names:
+                metric = f"api_request_{name}_total"
+                lines += [
+                    f"# HELP {metric} Sum of {name.replace('_', ' ')} by route.",
+                    f"# TYPE {metric} counter",
+                ]
+                for route, totals in sorted(self.totals.items()):
+                    lines.append(f"{metric}{{{_labels(route=route)}}} {totals[name]}")
+
+        lines += [
+            "# HELP api_response_cache_total Response cache lookups by result.",
+            "# TYPE api_response_cache_total counter",
+        ]
+        for resource, counts in sorted(response_cache.cache_stats().items()):
+            for result, count in sorted(counts.items()):
+                labels = _labels(resource=resource, result=result)
+                lines.append(f"api_response_cache_total{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,267 @@
+import hashlib
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+
+from . import cache as response_cache
+from . import compression, db_routers, hashing, metrics, throttling
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+# リクエストごとにレイテンシ・SQL回数/時間・シリアライズ時間・レスポンスサイズを計測する
+# 計測値はルート名（api:vehicle-listなど）ごとにmetrics.registryへ集計し、
+# Server-Timingヘッダーでリクエスト単位の内訳を返す
+# ASGIの非同期ビューをスレッドに載せ替えないよう、同期・非同期の両方に対応する
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, token = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            with self.wrap_connections(timings):
+                response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self.finish(request, response, timings, start)
+
+    async def __acall__(self, request):
+        timings, token = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            with self.wrap_connections(timings):
+                response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self.finish(request, response, timings, start)
+
+    def wrap_connections(self, timings):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timings.sql_wrapper))
+        return stack
+
+    def finish(self, request, response, timings, start):
+        duration = time.perf_counter() - start
+        match = getattr(request, "resolver_match", None)
+        route = match.view_name if match else "unmatched"
+        size = 0 if response.streaming else len(response.content)
+        metrics.registry.observe(
+            route, request.method, response.status_code, duration, timings, size
+        )
+        response["Server-Timing"] = self.server_timing(timings, duration)
+        return response
+
+    def server_timing(self, timings, duration):
+        entries = [
+            f'db;dur={timings.durations["db"] * 1000:.2f};desc="{timings.queries} queries"'
+        ]
+        entries += [
+            f"{name};dur={seconds * 1000:.2f}"
+            for name, seconds in timings.durations.items()
+            if name != "db"
+        ]
+        entries.append(f"total;dur={duration * 1000:.2f}")
+        return ", ".join(entries)
+
+
+# 処理中のリクエスト数がAPI_LOAD_SHEDDING["MAX_IN_FLIGHT"]に達したら、処理せずに503とRetry-Afterを返す
+# 処理待ちが積み上がって全リクエストのレイテンシが悪化する前に、超えた分だけを早く断る
+# 数はプロセスごと（同期のスレッド・非同期のタスクの両方）で、EXEMPT_PATHS（監視用など）は数えない
+class LoadSheddingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        options = self.get_options()
+        if request.path in options["EXEMPT_PATHS"]:
+            return self.get_response(request)
+        if not throttling.in_flight.enter(options["MAX_IN_FLIGHT"]):
+            return self.overloaded(options["RETRY_AFTER"])
+        response = None
+        try:
+            response = self.get_response(request)
+        finally:
+            self.release(response)
+        return response
+
+    async def __acall__(self, request):
+        options = self.get_options()
+        if request.path in options["EXEMPT_PATHS"]:
+            return await self.get_response(request)
+        if not throttling.in_flight.enter(options["MAX_IN_FLIGHT"]):
+            return self.overloaded(options["RETRY_AFTER"])
+        response = None
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.release(response)
+        return response
+
+    # ストリーミングのレスポンス（エクスポートなど）は出力し終えて閉じるまで処理中として数える
+    def release(self, response):
+        if response is not None and response.streaming:
+            response._resource_closers.append(throttling.in_flight.leave)
+        else:
+            throttling.in_flight.leave()
+
+    def get_options(self):
+        options = {"MAX_IN_FLIGHT": 64, "RETRY_AFTER": 1, "EXEMPT_PATHS": []}
+        options.update(getattr(settings, "API_LOAD_SHEDDING", {}))
+        return options
+
+    # パスワードのハッシュ計算の待ちが上限に達した場合（/api/auth/・ユーザー作成・管理画面のログイン）
+    def process_exception(self, request, exception):
+        if isinstance(exception, hashing.HashingBusy):
+            return self.overloaded(exception.wait, exception.detail)
+        return None
+
+    def overloaded(
+        self, retry_after, detail="The server is overloaded. Please retry later."
+    ):
+        response = JsonResponse({"detail": detail}, status=503)
+        response["Retry-After"] = str(retry_after)
+        return response
+
+
+# 書き込み（POST/PUT/PATCH/DELETE）のリクエストと、その後API_REPLICA_PIN_SECONDSの間の
+# 同じクライアントのリクエストをプライマリから読み取る（自分の書き込みを読めるようにする）
+# クライアントはCookie、またはAuthorizationヘッダー（Cookieを保存しないAPIクライアント）で識別する
+class ReplicaPinningMiddleware:
+    sync_capable = True
+    async_capable = True
+    cookie_name = "api_primary"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = db_routers.pin(self.should_pin(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            db_routers.unpin(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        token = db_routers.pin(self.should_pin(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            db_routers.unpin(token)
+        return self.finish(request, response)
+
+    def should_pin(self, request):
+        if not db_routers.get_replicas():
+            return False
+        if request.method not in SAFE_METHODS or self.cookie_name in request.COOKIES:
+            return True
+        key = self.get_cache_key(request)
+        return key is not None and cache.get(key) is not None
+
+    def finish(self, request, response):
+        if request.method in SAFE_METHODS or not db_routers.get_replicas():
+            return response
+        seconds = getattr(settings, "API_REPLICA_PIN_SECONDS", 10)
+        key = self.get_cache_key(request)
+        if key is not None:
+            cache.set(key, 1, seconds)
+        response.set_cookie(
+            self.cookie_name, "1", max_age=seconds, httponly=True, samesite="Lax"
+        )
+        return response
+
+    def get_cache_key(self, request):
+        auth = request.META.get("HTTP_AUTHORIZATION")
+        if not auth:
+            return None
+        return f"api:replica-pin:{hashlib.md5(auth.encode()).hexdigest()}"
+
+
+# Accept-Encodingに応じてJSONのレスポンスをzstd/br/gzipで圧縮する
+# API_COMPRESSION["MIN_SIZE"]未満のレスポンス・ストリーミングのレスポンスは圧縮しない
+# レスポンスキャッシュから返すレスポンス（compression_cache_keyあり）は圧縮結果もキャッシュし、
+# 同じ内容を何度も圧縮しない
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        options = compression.get_options()
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or content_type not in options["CONTENT_TYPES"]
+            or len(response.content) < options["MIN_SIZE"]
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = compression.negotiate(request.META.get("HTTP_ACCEPT_ENCODING"))
+        if encoding is None:
+            return response
+
+        with metrics.timed("compression"):
+            content = self.compress(response, encoding)
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response["Content-Length"] = str(len(content))
+        response["Content-Encoding"] = encoding
+        # 圧縮後は別の表現になるため、強いETagは弱いETagにする
+        etag = response.get("ETag")
+        if etag and not etag.startswith("W/"):
+            response["ETag"] = f"W/{etag}"
+        return response
+
+    def compress(self, response, encoding):
+        cache_key = getattr(response, "compression_cache_key", None)
+        if cache_key is None:
+            return compression.compress(encoding, response.content)
+        cache = response_cache.get_cache()
+        key = f"{cache_key}:{encoding}"
+        content = cache.get(key)
+        if content is None:
+            content = compression.compress(encoding, response.content)
+            cache.set(key, content, response_cache.get_options()["TIMEOUT"])
+        return content
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_vehicle_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vehicle",
+            name="brand_name",
+            field=models.CharField(editable=False, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name="vehicle",
+            name="segment_name",
+            field=models.CharField(editable=False, max_length=100, null=True),
+        ),
+    ]
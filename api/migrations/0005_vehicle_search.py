@@ -0,0 +1,74 @@
+from django.db import migrations
+
+# Vehicleの車名・Segment名・Brand名の全文検索用インデックス（SQLiteのFTS5）
+# 内容はapi_vehicleを参照する外部コンテンツテーブルで、トリガーでapi_vehicleの変更に追従する
+# Segment・Brandの名前の変更はVehicleのコピー列（segment_name/brand_name）の更新で反映される
+# prefix='2 3': 2・3文字の前方一致用のインデックスも作成する
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE api_vehicle_search USING fts5(
+        vehicle_name, segment_name, brand_name,
+        content='api_vehicle', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER api_vehicle_search_insert AFTER INSERT ON api_vehicle BEGIN
+        INSERT INTO api_vehicle_search(rowid, vehicle_name, segment_name, brand_name)
+        VALUES (new.id, new.vehicle_name, new.segment_name, new.brand_name);
+    END
+    """,
+    """
+    CREATE TRIGGER api_vehicle_search_delete AFTER DELETE ON api_vehicle BEGIN
+        INSERT INTO api_vehicle_search(
+            api_vehicle_search, rowid, vehicle_name, segment_name, brand_name
+        )
+        VALUES ('delete', old.id, old.vehicle_name, old.segment_name, old.brand_name);
+    END
+    """,
+    # 保存時は全列をUPDATEするため、検索対象の列が変わった場合のみ更新する
+    """
+    CREATE TRIGGER api_vehicle_search_update AFTER UPDATE ON api_vehicle
+    WHEN old.vehicle_name IS NOT new.vehicle_name
+        OR old.segment_name IS NOT new.segment_name
+        OR old.brand_name IS NOT new.brand_name
+    BEGIN
+        INSERT INTO api_vehicle_search(
+            api_vehicle_search, rowid, vehicle_name, segment_name, brand_name
+        )
+        VALUES ('delete', old.id, old.vehicle_name, old.segment_name, old.brand_name);
+        INSERT INTO api_vehicle_search(rowid, vehicle_name, segment_name, brand_name)
+        VALUES (new.id, new.vehicle_name, new.segment_name, new.brand_name);
+    END
+    """,
+    # 既存の行からインデックスを作成する
+    "INSERT INTO api_vehicle_search(api_vehicle_search) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS api_vehicle_search_update",
+    "DROP TRIGGER IF EXISTS api_vehicle_search_delete",
+    "DROP TRIGGER IF EXISTS api_vehicle_search_insert",
+    "DROP TABLE IF EXISTS api_vehicle_search",
+]
+
+
+# SQLite以外のDBでは作成しない（api.searchはLIKEでの検索になる）
+def run_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == "sqlite":
+            for sql in statements:
+                schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_vehicle_names"),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sqlite(CREATE_SQL), run_sqlite(DROP_SQL)),
+    ]
@@ -0,0 +1,63 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# 外部キー（user）の単独のインデックス（Djangoが自動で作成した名前）
+USER_INDEX = "api_vehicle_user_id_91f69e0f"
+
+
+# ユーザーでの絞り込みは(user, id)のvehicle_user_id_idxで行うため、userの単独のインデックスを削除する
+# SQLiteのAlterFieldはテーブルを作り直し、全文検索のトリガー（0005_vehicle_search）も消えるため、
+# テーブルはそのままでインデックスのみを削除する
+def drop_user_index(apps, schema_editor):
+    Vehicle = apps.get_model("api", "Vehicle")
+    table = Vehicle._meta.db_table
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    for name, constraint in constraints.items():
+        if (
+            constraint["columns"] == ["user_id"]
+            and constraint["index"]
+            and not constraint["unique"]
+            and not constraint["primary_key"]
+        ):
+            schema_editor.execute(
+                schema_editor.sql_delete_index
+                % {
+                    "table": schema_editor.quote_name(table),
+                    "name": schema_editor.quote_name(name),
+                }
+            )
+
+
+def create_user_index(apps, schema_editor):
+    Vehicle = apps.get_model("api", "Vehicle")
+    schema_editor.add_index(Vehicle, models.Index(fields=["user"], name=USER_INDEX))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_vehicle_search"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(drop_user_index, create_user_index),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="vehicle",
+                    name="user",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,285 @@
+from django.conf import settings
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils.http import http_date
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.permissions import SAFE_METHODS, BasePermission
+from rest_framework.response import Response
+from . import cache as response_cache
+from . import db_routers
+from . import idempotency
+from . import metrics
+from . import versions
+from .serializers import ValuesSerializer
+
+
+# 配列で受け取った複数件をまとめて登録・更新・削除する（/api/<resource>/bulk/）
+# POST: 一括登録 / PUT・PATCH: 一括更新 / DELETE: 一括削除
+# 1件ずつのバリデーションエラーは index付きで返し、正常な行だけを書き込む
+class BulkModelMixin:
+    # bulk_create/bulk_updateで1回のSQLにまとめる件数
+    bulk_batch_size = 500
+
+    # 一括登録時にvalidated_dataへ追加する値（perform_createのserializer.save()の引数に相当）
+    def get_bulk_save_kwargs(self):
+        return {}
+
+    # bulk_create/bulk_updateの直前に呼ばれる（シグナルが発火しないため保存時の処理はここで行う）
+    # 更新する列（bulk_createの場合はNone）を受け取り、追加した列を含めて返す
+    def prepare_bulk_instances(self, instances, fields):
+        return fields
+
+    # bulk_updateの後に同じトランザクション内で呼ばれる
+    def after_bulk_update(self, instances, fields):
+        pass
+
+    def get_bulk_rows(self, request):
+        rows = request.data
+        if not isinstance(rows, list):
+            raise serializers.ValidationError(
+                {"non_field_errors": ["Expected a list of items."]}
+            )
+        max_size = getattr(settings, "API_BULK_MAX_SIZE", 10000)
+        if len(rows) > max_size:
+            raise serializers.ValidationError(
+                {
+                    "non_field_errors": [
+                        f"Ensure there are no more than {max_size} items."
+                    ]
+                }
+            )
+        return rows
+
+    # 一括登録
+    @action(detail=False, methods=["post"], url_path="bulk", url_name="bulk")
+    def bulk_create(self, request):
+        rows = self.get_bulk_rows(request)
+        serializer = self.get_serializer(data=rows, many=True)
+        child = serializer.child
+        model = child.Meta.model
+        extra = self.get_bulk_save_kwargs()
+
+        instances, errors = [], []
+        for index, row in enumerate(rows):
+            try:
+                attrs = child.run_validation(row)
+            except serializers.ValidationError as exc:
+                errors.append({"index": index, "errors": exc.detail})
+                continue
+            instances.append(model(**attrs, **extra))
+
+        self.prepare_bulk_instances(instances, None)
+        with transaction.atomic():
+            created = model.objects.bulk_create(
+                instances, batch_size=self.bulk_batch_size
+            )
+            # bulk_createはシグナルが発火しないためここでバージョンを進める
+            versions.bump(model)
+
+        response = {
+            "created": [child.to_representation(instance) for instance in created],
+            "errors": errors,
+        }
+        if errors and not created:
+            return Response(response, status=status.HTTP_400_BAD_REQUEST)
+        return Response(response, status=status.HTTP_201_CREATED)
+
+    # 一括更新（各要素に"id"が必要、PATCHは部分更新）
+    @bulk_create.mapping.put
+    @bulk_create.mapping.patch
+    def bulk_update(self, request):
+        rows = self.get_bulk_rows(request)
+        partial = request.method == "PATCH"
+        ids = [row.get("id") for row in rows if isinstance(row, dict)]
+        existing = self.filter_queryset(self.get_queryset()).in_bulk(
+            [pk for pk in ids if isinstance(pk, int)]
+        )
+
+        updated, fields, errors = {}, set(), []
+        for index, row in enumerate(rows):
+            instance = existing.get(row.get("id")) if isinstance(row, dict) else None
+            if instance is None:
+                errors.append({"index": index, "errors": {"id": ["Not found."]}})
+                continue
+            serializer = self.get_serializer(instance, data=row, partial=partial)
+            if not serializer.is_valid():
+                errors.append({"index": index, "errors": serializer.errors})
+                continue
+            for attr, value in serializer.validated_data.items():
+                setattr(instance, attr, value)
+            fields.update(serializer.validated_data)
+            updated[instance.pk] = instance
+
+        instances = list(updated.values())
+        if instances and fields:
+            fields = self.prepare_bulk_instances(instances, fields)
+            with transaction.atomic():
+                type(instances[0]).objects.bulk_update(
+                    instances, sorted(fields), batch_size=self.bulk_batch_size
+                )
+                self.after_bulk_update(instances, fields)
+                versions.bump(type(instances[0]))
+
+        serializer = self.get_serializer(instances, many=True)
+        response = {"updated": serializer.data, "errors": errors}
+        if errors and not instances:
+            return Response(response, status=status.HTTP_400_BAD_REQUEST)
+        return Response(response, status=status.HTTP_200_OK)
+
+    # 一括削除（{"ids": [1, 2, ...]}）
+    @bulk_create.mapping.delete
+    def bulk_delete(self, request):
+        ids = request.data.get("ids") if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+            raise serializers.ValidationError({"ids": ["Expected a list of ids."]})
+
+        queryset = self.filter_queryset(self.get_queryset()).filter(pk__in=ids)
+        found = set(queryset.values_list("pk", flat=True))
+        with transaction.atomic():
+            queryset.model.objects.filter(pk__in=found).delete()
+
+        response = {
+            "deleted": sorted(found),
+            "not_found": sorted(set(ids) - found),
+        }
+        return Response(response, status=status.HTTP_200_OK)
+
+
+# list/retrieveの結果をキャッシュから返す（参照用の小さなマスタデータ向け）
+# 書き込みが成功したら世代番号を進めてキャッシュを無効化する（管理画面・ORMからの変更はsignalsで無効化）
+class CachedReadMixin:
+    # キャッシュキー・カウンタに使うリソース名
+    cache_resource = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        cache = response_cache.get_cache()
+        key = response_cache.make_key(self.cache_resource, request)
+        # 圧縮したレスポンスも同じキーでキャッシュする（CompressionMiddleware）
+        self.compression_cache_key = key
+        data = cache.get(key)
+        if data is not None:
+            response_cache.record(self.cache_resource, "hits")
+            return Response(data)
+
+        response_cache.record(self.cache_resource, "misses")
+        # 世代番号は書き込み時に進むため、反映が遅れたレプリカの内容を新しい世代で保存しないよう
+        # キャッシュするデータはプライマリから読み取る
+        with db_routers.use_primary():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, response_cache.get_options()["TIMEOUT"])
+        return response
+
+    # bulk操作などシグナルが発火しない書き込みもここで無効化する
+    def finalize_response(self, request, response, *args, **kwargs):
+        if request.method not in SAFE_METHODS and status.is_success(
+            response.status_code
+        ):
+            response_cache.invalidate(self.cache_resource)
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, "compression_cache_key", None)
+        if key is not None and response.status_code == status.HTTP_200_OK:
+            # 出力形式（JSON・列形式など）ごとに圧縮結果が異なるためキーに含める
+            response.compression_cache_key = f"{key}:{response.accepted_media_type}"
+        return response
+
+
+# list/retrieveにETag/Last-Modifiedを付与し、クライアントのデータが最新なら304を返す
+# 検証子はテーブルのバージョン（TableVersion）から作るため、304の場合はシリアライズを行わない
+class ConditionalGetMixin:
+    # レスポンス内容が依存するモデル（いずれかが変更されたらETagが変わる）
+    version_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def get_conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = versions.get_validators(
+            self.version_models, request, scope=self.get_validator_scope()
+        )
+        if versions.is_not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    # レスポンスの内容がユーザーによって変わる場合はETagに含める値を返す
+    def get_validator_scope(self):
+        return ""
+
+
+# list/retrieveをvalues_list()から直接返す（モデルのインスタンス化・フィールドごとの処理を省く）
+# 出力はserializer_classと同じ（ValuesSerializer）
+class ValuesReadMixin:
+    def get_values_serializer(self, queryset=None):
+        # ページネーションの並び替えの列はカーソルの位置の算出に使うため合わせて取得する
+        # （?fields=で出力しない列も含む）
+        extra_columns = ()
+        if queryset is not None and hasattr(self.paginator, "get_ordering"):
+            extra_columns = [
+                term.removeprefix("-")
+                for term in self.paginator.get_ordering(self.request, queryset, self)
+            ]
+        return ValuesSerializer(self.get_serializer(), extra_columns=extra_columns)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        values_serializer = self.get_values_serializer(queryset)
+        rows = values_serializer.get_rows(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                values_serializer.to_representation(page)
+            )
+        return Response(values_serializer.to_representation(rows))
+
+    # values_list()の行ではhas_object_permission（モデルのインスタンスを受け取る）を確認できないため、
+    # オブジェクト単位の権限がある場合はget_object()で取得する通常の処理にする
+    def retrieve(self, request, *args, **kwargs):
+        if self.has_object_permissions():
+            return super().retrieve(request, *args, **kwargs)
+        values_serializer = self.get_values_serializer()
+        rows = values_serializer.get_rows(self.filter_queryset(self.get_queryset()))
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            rows, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        return Response(values_serializer.to_representation([row])[0])
+
+    # 権限クラスがオブジェクト単位の確認（has_object_permission）を実装しているか
+    def has_object_permissions(self):
+        return any(
+            type(permission).has_object_permission
+            is not BasePermission.has_object_permission
+            for permission in self.get_permissions()
+        )
+
+
+# Idempotency-Keyヘッダー付きの登録（POST）は最初のレスポンスを保存し、
+# タイムアウト後の再送などで同じキーが送られた場合は登録せずにそのレスポンスを返す（api.idempotency）
+class IdempotentCreateMixin:
+    def create(self, request, *args, **kwargs):
+        handler = super().create
+        return idempotency.run(request, lambda: handler(request, *args, **kwargs))
+
+
+# 認証にかかった時間を計測する（Server-Timingのauth）
+class TimedAuthenticationMixin:
+    def perform_authentication(self, request):
+        with metrics.timed("auth"):
+            super().perform_authentication(request)
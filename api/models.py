@@ -17,12 +17,43 @@ class Brand(models.Model):
 
 
 class Vehicle(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # ユーザーでの絞り込みは(user, id)のインデックス（vehicle_user_id_idx）を使うため、外部キーの単独のインデックスは作らない
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     vehicle_name = models.CharField(max_length=100)
     release_year = models.IntegerField()
     price = models.DecimalField(max_digits=6, decimal_places=2)
     segment = models.ForeignKey(Segment, on_delete=models.CASCADE)
     brand = models.ForeignKey(Brand, on_delete=models.CASCADE)
+    # Segment・Brandの名前のコピー（API_VEHICLE_DENORMALIZED_NAMESの場合に読み取りで使用）
+    # 保存時・名前の変更時にapi.denormalizeで更新する（NULLはbackfill_vehicle_namesで未反映の行）
+    segment_name = models.CharField(max_length=100, null=True, editable=False)
+    brand_name = models.CharField(max_length=100, null=True, editable=False)
+
+    # 絞り込み・並び替えに使う列のインデックス
+    class Meta:
+        indexes = [
+            models.Index(fields=["release_year"], name="vehicle_release_year_idx"),
+            models.Index(fields=["price"], name="vehicle_price_idx"),
+            models.Index(fields=["vehicle_name"], name="vehicle_name_idx"),
+            models.Index(
+                fields=["brand", "release_year"], name="vehicle_brand_year_idx"
+            ),
+            models.Index(
+                fields=["segment", "release_year"], name="vehicle_segment_year_idx"
+            ),
+            models.Index(fields=["user", "id"], name="vehicle_user_id_idx"),
+        ]
 
     def __str__(self):
         return self.vehicle_name
+
+
+# テーブルごとの変更バージョン（ETag/Last-Modifiedの算出に使用）
+# Segment・Brand・Vehicleへの書き込みのたびにversionを1つ進める
+class TableVersion(models.Model):
+    table = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.table}:{self.version}"
@@ -0,0 +1,72 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# idをキーにしたカーソルページネーション
+# OFFSET/LIMITと違い「id > 前ページ末尾」で検索するため深いページでもコストが変わらない
+class IdCursorPagination(CursorPagination):
+    ordering = "id"
+    # ?page_size=でクライアントから件数を指定できる
+    page_size_query_param = "page_size"
+    # settings.API_PAGE_SIZESのキー（サブクラスで指定）
+    page_size_key = None
+
+    def get_page_size(self, request):
+        page_sizes = getattr(settings, "API_PAGE_SIZES", {})
+        self.page_size = page_sizes.get(self.page_size_key, self.page_size)
+        self.max_page_size = page_sizes.get("max", self.max_page_size)
+        return super().get_page_size(request)
+
+
+class SegmentPagination(IdCursorPagination):
+    page_size_key = "segments"
+
+
+class BrandPagination(IdCursorPagination):
+    page_size_key = "brands"
+
+
+class VehiclePagination(IdCursorPagination):
+    page_size_key = "vehicles"
+
+
+# 検索結果のページネーション（?limit=&offset=）
+# 関連度順のためカーソルではなくオフセットで指定する
+# 件数（count）は数えず、limit+1件を取得して次のページの有無を判定する
+class SearchPagination(LimitOffsetPagination):
+    page_size_key = "search"
+
+    def get_limit(self, request):
+        page_sizes = getattr(settings, "API_PAGE_SIZES", {})
+        self.default_limit = page_sizes.get(self.page_size_key, self.default_limit)
+        self.max_limit = page_sizes.get("max", self.max_limit)
+        return super().get_limit(request)
+
+    # fetch(limit, offset)で取得した結果を1ページ分にして返す
+    def paginate_results(self, fetch, request):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        results = fetch(self.limit + 1, self.offset)
+        self.has_next = len(results) > self.limit
+        return results[: self.limit]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
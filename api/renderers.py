@@ -0,0 +1,80 @@
+import decimal
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Prometheusのテキスト形式（text/plain; version=0.0.4）
+class PrometheusRenderer(BaseRenderer):
+    media_type = "text/plain"
+    format = "txt"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data.encode(self.charset) if isinstance(data, str) else b""
+
+
+# orjsonで出力するJSONRenderer（インストールされていない場合・インデント指定時はJSONRendererと同じ）
+# 出力はJSONRendererと同じ（コンパクト・UTF-8・Decimalは文字列）
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(
+            accepted_media_type or "", renderer_context or {}
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        ret = orjson.dumps(
+            data,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+        # JSONRendererと同様にJavaScriptで不正な文字をエスケープする
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028")
+            ret = ret.replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+def _default(obj):
+    # floatにすると精度が落ちるため、COERCE_DECIMAL_TO_STRINGの場合は文字列にする
+    if isinstance(obj, decimal.Decimal) and api_settings.COERCE_DECIMAL_TO_STRING:
+        return str(obj)
+    return JSONEncoder().default(obj)
+
+
+# 一覧を列名1回＋値の配列で返すJSON（Accept: application/vnd.columnar+json または ?format=columnar）
+# {"next": ..., "previous": ..., "columns": ["id", ...], "rows": [[1, ...], ...]}
+# 一覧以外（1件・エラーなど）は通常のJSONと同じ
+class ColumnarJSONRenderer(FastJSONRenderer):
+    media_type = "application/vnd.columnar+json"
+    format = "columnar"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(to_columnar(data), accepted_media_type, renderer_context)
+
+
+def _rows(data):
+    columns = list(data[0]) if data else []
+    # シリアライザの出力は全行で列が同じ順序のため、そのまま値を取り出す
+    if all(list(row) == columns for row in data):
+        return columns, [list(row.values()) for row in data]
+    columns = list({column: None for row in data for column in row})
+    return columns, [[row.get(column) for column in columns] for row in data]
+
+
+# 辞書のリスト（ページネーションのresultsを含む）を列形式に変換する
+def to_columnar(data):
+    if isinstance(data, dict) and isinstance(data.get("results"), list):
+        page = {key: value for key, value in data.items() if key != "results"}
+        return {**page, **to_columnar(data["results"])}
+    if isinstance(data, list) and all(isinstance(row, dict) for row in data):
+        columns, rows = _rows(data)
+        return {"columns": columns, "rows": rows}
+    return data
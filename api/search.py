@@ -0,0 +1,105 @@
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+
+# 全文検索のインデックス（migrations/0005_vehicle_search）
+TABLE = "api_vehicle_search"
+# インデックスの列（weightsの順序）
+COLUMNS = ("vehicle_name", "segment_name", "brand_name")
+
+
+def get_options():
+    options = {
+        # 検索に使う語の最大数（それ以降は無視する）
+        "MAX_TERMS": 8,
+        # 前方一致にする語の最小の文字数（短い語は完全一致）
+        "MIN_PREFIX": 2,
+        # 関連度（bm25）の列ごとの重み（車名の一致を重視する）
+        "WEIGHTS": (10.0, 2.0, 2.0),
+        # 関連度順に並べる車名の一致の最大数（それ以外の一致は新しい順）
+        "MAX_RESULTS": 1000,
+    }
+    options.update(getattr(settings, "API_SEARCH", {}))
+    return options
+
+
+# 入力から検索語を取り出す（記号は区切りとして扱う）
+def get_terms(query):
+    return re.findall(r"\w+", query.lower())[: get_options()["MAX_TERMS"]]
+
+
+# FTS5のMATCHの式にする（"model"* "toy"* のように各語の前方一致をANDで結ぶ）
+# 語は\wの文字のみ（引用符を含まない）のため、引用符で囲めばFTS5の構文として解釈されない
+def to_match(terms):
+    min_prefix = get_options()["MIN_PREFIX"]
+    return " ".join(
+        f'"{term}"*' if len(term) >= min_prefix else f'"{term}"' for term in terms
+    )
+
+
+# 検索語に一致するVehicleのidを関連度順にoffset件目からlimit件返す
+# queryset: 検索対象のVehicle（ユーザーの範囲など）、user_id: 指定した場合はそのユーザーのVehicleのみ
+# SQLiteはFTS5のインデックスから検索し、テーブルの件数によらず一致した行だけを読む
+# 多くの行に一致する語（Brand名など）でも関連度の計算が一致件数に比例しないよう、2段階で並べる
+# 1. すべての語が車名に一致する行: 新しい順にMAX_RESULTS件までを関連度順に並べる
+# 2. それ以外に一致した行（1.の上限を超えた車名の一致を含む）: 関連度を計算せずに新しい順
+def search_ids(queryset, query, limit, offset=0, user_id=None):
+    terms = get_terms(query)
+    if not terms or not limit:
+        return []
+    connection = connections[queryset.db]
+    if connection.vendor != "sqlite":
+        return _search_ids_like(queryset, terms, limit, offset)
+
+    options = get_options()
+    match = to_match(terms)
+    name_match = f"{COLUMNS[0]} : ({match})"
+    weights = ", ".join(str(float(weight)) for weight in options["WEIGHTS"])
+    candidates, params = _select(
+        f"{TABLE}.rowid AS id, bm25({TABLE}, {weights}) AS score", name_match, user_id
+    )
+    candidates += f" ORDER BY {TABLE}.rowid DESC LIMIT %s"
+    params.append(options["MAX_RESULTS"])
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT id FROM ({candidates}) ORDER BY score, id DESC", params)
+        ranked = [row[0] for row in cursor.fetchall()]
+        ids = ranked[offset : offset + limit]
+        if len(ids) == limit:
+            return ids
+
+        # 1.の候補を除いた残りの一致（FTS5のrowidの順に読むため並び替えない）
+        sql, rest_params = _select(f"{TABLE}.rowid", match, user_id)
+        if ranked:
+            sql += f" AND {TABLE}.rowid NOT IN ({', '.join(['%s'] * len(ranked))})"
+            rest_params += ranked
+        sql += f" ORDER BY {TABLE}.rowid DESC LIMIT %s OFFSET %s"
+        rest_params += [limit - len(ids), max(0, offset - len(ranked))]
+        cursor.execute(sql, rest_params)
+        return ids + [row[0] for row in cursor.fetchall()]
+
+
+# FTS5のインデックスからMATCHの式に一致する行を読むSELECT（ユーザーの範囲はVehicleとJOINして絞り込む）
+def _select(columns, match, user_id):
+    sql = f"SELECT {columns} FROM {TABLE}"
+    params = [match]
+    if user_id is not None:
+        sql += f" JOIN api_vehicle ON api_vehicle.id = {TABLE}.rowid"
+    sql += f" WHERE {TABLE} MATCH %s"
+    if user_id is not None:
+        sql += " AND api_vehicle.user_id = %s"
+        params.append(user_id)
+    return sql, params
+
+
+# FTS5がないDB用: 各語をいずれかの列に含む行を新しい順に返す（関連度の順位はない）
+def _search_ids_like(queryset, terms, limit, offset):
+    for term in terms:
+        condition = Q()
+        for column in COLUMNS:
+            condition |= Q(**{f"{column}__icontains": term})
+        queryset = queryset.filter(condition)
+    return list(
+        queryset.order_by("-id").values_list("id", flat=True)[offset : offset + limit]
+    )
@@ -1,9 +1,28 @@
 from rest_framework import serializers
 from .models import Segment, Brand, Vehicle
 from django.contrib.auth.models import User
+from . import denormalize
+from . import hashing
+from . import metrics
 
 
-class UserSerializer(serializers.ModelSerializer):
+# 一覧（many=True）のシリアライズ時間を計測する
+class TimedListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        with metrics.timed("serializer"):
+            return super().to_representation(data)
+
+
+# 単体のシリアライズ時間を計測する（一覧の要素はTimedListSerializer側で計測）
+class TimedModelSerializer(serializers.ModelSerializer):
+    def to_representation(self, instance):
+        if self.parent is not None:
+            return super().to_representation(instance)
+        with metrics.timed("serializer"):
+            return super().to_representation(instance)
+
+
+class UserSerializer(TimedModelSerializer):
     # Metaクラスを定義
     class Meta:
         # model: モデルを指定
@@ -11,36 +30,45 @@ class UserSerializer(serializers.ModelSerializer):
         # extra_kwargs: バリデーション
         model = User
         fields = ["id", "username", "password"]
+        list_serializer_class = TimedListSerializer
         extra_kwargs = {
             "password": {"write_only": True, "required": True, "min_length": 1}
         }
 
     # ユーザーを作成する（パスワードを暗号化する）
+    # ハッシュ計算はhashing.poolで行い、混雑時は503を返す
     def create(self, validated_data):
+        validated_data["username"] = User.normalize_username(validated_data["username"])
+        validated_data["password"] = hashing.make_password(validated_data["password"])
         # **を付与することでdict型のvalidated_dateを展開して引数として渡す
-        user = User.objects.create_user(**validated_data)
+        user = User.objects.create(**validated_data)
         return user
 
 
-class SegmentSerializer(serializers.ModelSerializer):
+class SegmentSerializer(TimedModelSerializer):
     class Meta:
         model = Segment
         fields = ["id", "segment_name"]
+        list_serializer_class = TimedListSerializer
 
 
-class BrandSerializer(serializers.ModelSerializer):
+class BrandSerializer(TimedModelSerializer):
     class Meta:
         model = Brand
         fields = ["id", "brand_name"]
+        list_serializer_class = TimedListSerializer
 
 
-class VehicleSerializer(serializers.ModelSerializer):
+class VehicleSerializer(TimedModelSerializer):
     # serializers.ReadOnlyFieldで直接取得
     segment_name = serializers.ReadOnlyField(
         source="segment.segment_name", read_only=True
     )
     brand_name = serializers.ReadOnlyField(source="brand.brand_name", read_only=True)
 
+    # ?expand=で埋め込めるフィールドと埋め込むオブジェクトのシリアライザ
+    expandable_fields = {"segment": SegmentSerializer, "brand": BrandSerializer}
+
     class Meta:
         model = Vehicle
         fields = [
@@ -55,3 +83,98 @@ class VehicleSerializer(serializers.ModelSerializer):
         ]
         # userを関連付ける
         extra_kwargs = {"user": {"read_only": True}}
+        list_serializer_class = TimedListSerializer
+
+    # API_VEHICLE_DENORMALIZED_NAMESの場合はVehicleのコピー列から読み取る（JOINしない）
+    # context["expand"]のフィールドは関連先のオブジェクトを埋め込み、
+    # context["fields"]を指定した場合はそのフィールド（と埋め込むフィールド）のみを出力する
+    def get_fields(self):
+        fields = super().get_fields()
+        if denormalize.is_enabled():
+            fields["segment_name"] = serializers.ReadOnlyField()
+            fields["brand_name"] = serializers.ReadOnlyField()
+        expand = self.context.get("expand") or ()
+        for name in expand:
+            fields[name] = self.expandable_fields[name](read_only=True)
+        selected = self.context.get("fields")
+        if selected:
+            fields = {
+                name: field
+                for name, field in fields.items()
+                if name in selected or name in expand
+            }
+        return fields
+
+
+# 読み取り専用の高速なシリアライズ（list/retrieve用）
+# values_list()のタプルから直接dictを作り、モデルのインスタンス化とフィールドごとの処理を省く
+# 出力はserializer（ModelSerializerのインスタンス）と同じで、変換が必要なフィールドのみ
+# そのフィールドのto_representationを呼ぶ
+class ValuesSerializer:
+    # DBの値をそのまま出力できるフィールド
+    passthrough_fields = (
+        serializers.IntegerField,
+        serializers.CharField,
+        serializers.ReadOnlyField,
+        serializers.PrimaryKeyRelatedField,
+    )
+
+    def __init__(self, serializer, extra_columns=()):
+        model = serializer.Meta.model
+        self.names, self.columns, self.converters = [], [], []
+        nested = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            self.names.append(name)
+            if isinstance(field, serializers.BaseSerializer):
+                # 埋め込み（?expand=）: 外部キーの列の位置に関連先のdictを入れる
+                self.columns.append(model._meta.get_field(field.source).attname)
+                nested.append((name, field))
+                continue
+            self.columns.append(self.get_column(model, field))
+            if not isinstance(field, self.passthrough_fields):
+                self.converters.append((name, field.to_representation))
+        # 出力しないが並び替え・ページネーションに使う列
+        self.extra_columns = [
+            column for column in extra_columns if column not in self.columns
+        ]
+        # 埋め込むオブジェクトの列（JOINして同じクエリで取得する）は末尾に追加する
+        self.nested = []
+        for name, field in nested:
+            child = ValuesSerializer(field)
+            start = len(self.columns) + len(self.extra_columns)
+            self.nested.append((name, start, start + len(child.columns), child))
+            self.extra_columns += [
+                "__".join([*field.source_attrs, column]) for column in child.columns
+            ]
+
+    # フィールドのsource（segment.segment_nameなど）をvalues_list()の列名にする
+    def get_column(self, model, field):
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            return model._meta.get_field(field.source).attname
+        return "__".join(field.source_attrs)
+
+    # ページネーションで並び替えの列を参照できるよう名前付きタプルで取得する
+    def get_rows(self, queryset):
+        return queryset.values_list(*self.columns, *self.extra_columns, named=True)
+
+    def to_representation(self, rows):
+        with metrics.timed("serializer"):
+            return [self.to_dict(row) for row in rows]
+
+    def to_dict(self, row):
+        data = dict(zip(self.names, row))
+        for name, convert in self.converters:
+            if data[name] is not None:
+                data[name] = convert(data[name])
+        for name, start, stop, child in self.nested:
+            if data[name] is not None:
+                data[name] = child.to_dict(row[start:stop])
+        return data
+
+    # モデルのインスタンスで読む場合（エクスポートなど）も出力に必要な列・JOINだけにする
+    def narrow(self, queryset):
+        columns = [*self.columns, *self.extra_columns]
+        relations = {column.split("__")[0] for column in columns if "__" in column}
+        return queryset.select_related(None).select_related(*relations).only(*columns)
@@ -0,0 +1,72 @@
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import authentication
+from . import cache as response_cache
+from . import database
+from . import denormalize
+from . import versions
+from .models import Brand, Segment, Vehicle
+
+# キャッシュ対象のモデルとリソース名
+CACHED_MODELS = {Segment: "segments", Brand: "brands"}
+
+
+# 管理画面・ORMから変更された場合もレスポンスキャッシュを無効化する
+@receiver(post_save, sender=Segment)
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Segment)
+@receiver(post_delete, sender=Brand)
+def invalidate_response_cache(sender, **kwargs):
+    response_cache.invalidate(CACHED_MODELS[sender])
+
+
+# Vehicleの保存時はSegment・Brandの名前をコピーする（読み取り時のJOINを省くため）
+@receiver(pre_save, sender=Vehicle)
+def copy_vehicle_names(sender, instance, raw=False, **kwargs):
+    if not raw:
+        denormalize.copy_names(instance)
+
+
+# Segment・Brandの名前が変わったらVehicleのコピーも更新する
+@receiver(post_save, sender=Segment)
+@receiver(post_save, sender=Brand)
+def propagate_vehicle_names(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        denormalize.propagate(instance)
+
+
+# 書き込みのたびにテーブルのバージョンを進める（ETag/Last-Modified用）
+@receiver(post_save, sender=Segment)
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Vehicle)
+def bump_table_version(sender, **kwargs):
+    versions.bump(sender)
+
+
+@receiver(post_delete, sender=Segment)
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=Vehicle)
+def bump_table_version_on_delete(sender, using, **kwargs):
+    versions.bump_once(sender, using)
+
+
+# トークン削除・ユーザー更新（無効化など）時は認証キャッシュから削除する
+@receiver(post_delete, sender=Token)
+def invalidate_token_cache(sender, instance, **kwargs):
+    authentication.invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_token_cache(sender, instance, **kwargs):
+    authentication.invalidate_user(instance.pk)
+
+
+# 接続のたびにプロファイルのPRAGMA（WAL・mmapなど）を適用する
+@receiver(connection_created)
+def apply_database_pragmas(sender, connection, **kwargs):
+    database.apply_pragmas(connection)
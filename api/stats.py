@@ -0,0 +1,71 @@
+from collections import defaultdict
+
+from django.db.models import Avg, Count, Max, Min
+from rest_framework import serializers
+
+from . import denormalize
+
+# 価格の集計値はpriceと同じく小数第2位までの文字列で返す
+PRICE_FIELD = serializers.DecimalField(max_digits=None, decimal_places=2)
+
+PRICE_AGGREGATES = {
+    "count": Count("id"),
+    "avg_price": Avg("price"),
+    "min_price": Min("price"),
+    "max_price": Max("price"),
+}
+
+
+def _format(row):
+    for name in ("avg_price", "min_price", "max_price"):
+        value = row[name]
+        row[name] = None if value is None else PRICE_FIELD.to_representation(value)
+    return row
+
+
+# id・名前ごとの件数・価格の集計と、年式ごとの件数（ヒストグラム）
+# GROUP BYで集計するため、クエリ数はグループ数・件数によらず2回
+def _group_stats(queryset, id_field, name_field, name):
+    years = defaultdict(dict)
+    for row in (
+        queryset.values(id_field, "release_year")
+        .annotate(count=Count("id"))
+        .order_by(id_field, "release_year")
+    ):
+        years[row[id_field]][str(row["release_year"])] = row["count"]
+
+    return [
+        _format(
+            {
+                "id": row[id_field],
+                name: row[name_field],
+                **{key: row[key] for key in PRICE_AGGREGATES},
+                "release_years": years[row[id_field]],
+            }
+        )
+        for row in queryset.values(id_field, name_field)
+        .annotate(**PRICE_AGGREGATES)
+        .order_by(id_field)
+    ]
+
+
+# Vehicleの集計結果（全体・Segment別・Brand別）を返す
+def vehicle_stats(queryset):
+    queryset = queryset.order_by()
+    summary = _format(queryset.aggregate(**PRICE_AGGREGATES))
+    summary["release_years"] = {
+        str(row["release_year"]): row["count"]
+        for row in queryset.values("release_year")
+        .annotate(count=Count("id"))
+        .order_by("release_year")
+    }
+    # API_VEHICLE_DENORMALIZED_NAMESの場合はVehicleのコピー列で集計する（JOINしない）
+    if denormalize.is_enabled():
+        segment_name, brand_name = "segment_name", "brand_name"
+    else:
+        segment_name, brand_name = "segment__segment_name", "brand__brand_name"
+    return {
+        "summary": summary,
+        "segments": _group_stats(queryset, "segment_id", segment_name, "segment_name"),
+        "brands": _group_stats(queryset, "brand_id", brand_name, "brand_name"),
+    }
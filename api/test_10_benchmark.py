@@ -0,0 +1,67 @@
+from django.test import TestCase
+from .benchmarks import data, runner, scoping, search, serialization
+from .models import Vehicle
+
+
+# ベンチマークのテスト
+class BenchmarkTests(TestCase):
+    # 指定した件数のデータが作成されること
+    def test_10_01_should_seed_data(self):
+        users = data.seed(users=2, segments=3, brands=2, vehicles=25)
+
+        self.assertEqual(users.count(), 2)
+        self.assertEqual(Vehicle.objects.count(), 25)
+
+    # シナリオの計測結果が集計されること
+    def test_10_02_should_run_scenario(self):
+        users = data.seed(users=1, vehicles=5)
+        scenario = runner.Scenario("vehicles.retrieve", "/api/vehicles/{id}/")
+
+        result = runner.run_scenario(scenario, users[0], iterations=3, warmup=1)
+
+        self.assertEqual(result["iterations"], 3)
+        self.assertEqual(result["statuses"], [200])
+        self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+
+    # 前回よりthreshold以上遅くなったシナリオが検出されること
+    def test_10_03_should_detect_regressions(self):
+        baseline = {"results": [{"name": "a", "p50_ms": 10.0, "p99_ms": 20.0}]}
+        results = {"results": [{"name": "a", "p50_ms": 11.0, "p99_ms": 30.0}]}
+
+        regressions = runner.compare(baseline, results, threshold=0.2)
+
+        self.assertEqual([r["metric"] for r in regressions], ["p99_ms"])
+
+    # モデル・values_list()のシリアライズで同じ件数が計測されること
+    def test_10_04_should_run_serialization(self):
+        data.seed(users=1, vehicles=5)
+
+        results = serialization.run_serialization(rows=5, iterations=2, warmup=0)
+
+        self.assertEqual([result["rows"] for result in results], [5, 5])
+        self.assertTrue(all(result["rows_per_second"] > 0 for result in results))
+
+    # テーブル全体の件数ごとにユーザーの一覧が計測されること
+    def test_10_05_should_run_scoping(self):
+        users = data.seed(users=2, vehicles=0)
+
+        results = scoping.run_scoping(
+            users[0], sizes=[10, 30], per_user=5, iterations=2, warmup=0
+        )
+
+        self.assertEqual([result["table_rows"] for result in results], [10, 10, 30, 30])
+        self.assertTrue(all(result["statuses"] == [200] for result in results))
+
+    # テーブル全体の件数ごとに全文検索が計測されること
+    def test_10_06_should_run_search(self):
+        users = data.seed(users=2, vehicles=0)
+
+        results = search.run_search(users[0], sizes=[10, 30], iterations=2, warmup=0)
+
+        self.assertEqual(
+            [result["table_rows"] for result in results],
+            [10] * len(search.SEARCH_SCENARIOS) + [30] * len(search.SEARCH_SCENARIOS),
+        )
+        self.assertTrue(all(result["statuses"] == [200] for result in results))
+        # bulk_createしたVehicleにもSegment・Brandの名前がコピーされていること
+        self.assertFalse(Vehicle.objects.filter(brand_name__isnull=True).exists())
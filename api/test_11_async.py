@@ -0,0 +1,68 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from .models import Segment, Brand, Vehicle
+from .serializers import SegmentSerializer, VehicleSerializer
+
+ASYNC_VEHICLES_URL = "/api/async/vehicles/"
+ASYNC_SEGMENTS_URL = "/api/async/segments/"
+
+
+# 非同期の読み取りAPIのテスト
+class AsyncReadApiTests(TestCase):
+    def setUp(self):
+        username = "testuser"
+        password = "testuser"
+        self.user = User.objects.create_user(username=username, password=password)
+        token = Token.objects.create(user=self.user)
+        self.headers = {"Authorization": f"Token {token.key}"}
+        self.segment = Segment.objects.create(segment_name="SUV")
+        brand = Brand.objects.create(brand_name="Toyota")
+        for i in range(3):
+            Vehicle.objects.create(
+                user=self.user,
+                vehicle_name=f"MODEL {i}",
+                release_year=2019,
+                price=500.00,
+                segment=self.segment,
+                brand=brand,
+            )
+
+    # 一覧の各要素がVehicleSerializerの出力と一致し、キーセットでページングできること
+    async def test_11_01_should_get_vehicles(self):
+        results = []
+        url = f"{ASYNC_VEHICLES_URL}?page_size=2"
+        while url:
+            res = await self.async_client.get(url, headers=self.headers)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            results += res.json()["results"]
+            url = res.json()["next"]
+
+        vehicles = Vehicle.objects.select_related("segment", "brand").order_by("id")
+        expected = [VehicleSerializer(vehicle).data async for vehicle in vehicles]
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results, expected)
+
+    # 1件取得がSegmentSerializerの出力と一致すること
+    async def test_11_02_should_get_single_segment(self):
+        res = await self.async_client.get(
+            f"{ASYNC_SEGMENTS_URL}{self.segment.pk}/", headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), SegmentSerializer(self.segment).data)
+
+    # 存在しないidは404が返却されること
+    async def test_11_03_should_not_get_missing_vehicle(self):
+        res = await self.async_client.get(
+            f"{ASYNC_VEHICLES_URL}0/", headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    # 認証していない場合は401が返却されること
+    async def test_11_04_should_not_get_vehicles_when_unauthorized(self):
+        res = await self.async_client.get(ASYNC_VEHICLES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
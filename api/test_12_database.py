@@ -0,0 +1,62 @@
+import os
+import tempfile
+
+from django.db import connections
+from django.test import TestCase
+from . import database
+
+
+# 接続設定のプロファイルのテスト
+class DatabaseProfileTests(TestCase):
+    def connect(self, pragmas):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        settings_dict = {
+            **connections["default"].settings_dict,
+            "NAME": os.path.join(tmpdir.name, "test.sqlite3"),
+            "PRAGMAS": pragmas,
+        }
+        wrapper = connections["default"].__class__(settings_dict)
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    # 接続時にPRAGMAが適用されること
+    def test_12_01_should_apply_pragmas_on_connect(self):
+        wrapper = self.connect(
+            {
+                "journal_mode": "WAL",
+                "synchronous": "NORMAL",
+                "cache_size": -2048,
+                "busy_timeout": 1234,
+            }
+        )
+
+        values = database.get_pragmas(
+            wrapper, ["journal_mode", "synchronous", "cache_size", "busy_timeout"]
+        )
+
+        # synchronous=NORMALは1
+        self.assertEqual(
+            values,
+            {
+                "journal_mode": "wal",
+                "synchronous": 1,
+                "cache_size": -2048,
+                "busy_timeout": 1234,
+            },
+        )
+
+    # PRAGMAがない場合は既定の設定のままであること
+    def test_12_02_should_keep_defaults_without_pragmas(self):
+        wrapper = self.connect({})
+
+        values = database.get_pragmas(wrapper, ["journal_mode"])
+
+        self.assertEqual(values, {"journal_mode": "delete"})
+
+    # 不正な値のPRAGMAは実行されないこと
+    def test_12_03_should_reject_invalid_pragma(self):
+        wrapper = self.connect({"journal_mode": "WAL; DROP TABLE api_vehicle"})
+
+        with self.assertRaises(ValueError):
+            wrapper.ensure_connection()
@@ -0,0 +1,94 @@
+import os
+import sqlite3
+import tempfile
+from contextlib import closing
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory, override_settings
+from . import database, db_routers
+from .middleware import ReplicaPinningMiddleware
+from .models import Vehicle
+
+
+# レプリカへの振り分けのテスト
+@override_settings(API_DATABASE_REPLICAS=["replica"])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = db_routers.ReplicaRouter()
+        self.factory = RequestFactory()
+        cache.clear()
+
+    # リクエストを処理し、その中でVehicleを読み取るDBを返す
+    def read_db(self, request):
+        used = []
+
+        def get_response(request):
+            used.append(self.router.db_for_read(Vehicle))
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(get_response)(request)
+        return used[0], response
+
+    # 読み取りはレプリカ、書き込みはプライマリに振り分けられること
+    def test_13_01_should_route_reads_to_replica(self):
+        self.assertEqual(self.router.db_for_read(Vehicle), "replica")
+        self.assertEqual(self.router.db_for_write(Vehicle), "default")
+
+    # 認証など対象外のアプリ・プライマリに固定中の読み取りはプライマリに振り分けられること
+    def test_13_02_should_route_pinned_reads_to_primary(self):
+        self.assertEqual(self.router.db_for_read(User), "default")
+        with db_routers.use_primary():
+            self.assertEqual(self.router.db_for_read(Vehicle), "default")
+        self.assertEqual(self.router.db_for_read(Vehicle), "replica")
+
+    # レプリカがない場合はプライマリに振り分けられること
+    @override_settings(API_DATABASE_REPLICAS=[])
+    def test_13_03_should_route_to_primary_without_replicas(self):
+        self.assertEqual(self.router.db_for_read(Vehicle), "default")
+
+    # 書き込みのリクエストとその後の同じクライアントの読み取りはプライマリから読むこと
+    def test_13_04_should_read_own_writes(self):
+        auth = {"HTTP_AUTHORIZATION": "Token abc"}
+
+        db, response = self.read_db(self.factory.post("/api/vehicles/", **auth))
+        self.assertEqual(db, "default")
+        self.assertIn("api_primary", response.cookies)
+
+        # Authorizationヘッダーで識別（Cookieなし）
+        db, _ = self.read_db(self.factory.get("/api/vehicles/", **auth))
+        self.assertEqual(db, "default")
+
+        # Cookieで識別
+        request = self.factory.get("/api/vehicles/")
+        request.COOKIES["api_primary"] = "1"
+        db, _ = self.read_db(request)
+        self.assertEqual(db, "default")
+
+        # 他のクライアントはレプリカから読むこと
+        db, _ = self.read_db(
+            self.factory.get("/api/vehicles/", HTTP_AUTHORIZATION="Token xyz")
+        )
+        self.assertEqual(db, "replica")
+
+    # レプリカはマイグレーションの対象外であること
+    def test_13_05_should_not_migrate_replica(self):
+        self.assertTrue(self.router.allow_migrate("default", "api"))
+        self.assertFalse(self.router.allow_migrate("replica", "api"))
+
+    # SQLiteのファイルがレプリカに複製されること
+    def test_13_06_should_copy_sqlite_file(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        source = os.path.join(tmpdir.name, "primary.sqlite3")
+        target = os.path.join(tmpdir.name, "replica.sqlite3")
+        with closing(sqlite3.connect(source)) as conn:
+            conn.execute("CREATE TABLE t (id INTEGER)")
+            conn.execute("INSERT INTO t VALUES (1), (2)")
+            conn.commit()
+
+        database.copy_sqlite(source, target)
+
+        with closing(sqlite3.connect(target)) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM t").fetchone(), (2,))
@@ -0,0 +1,97 @@
+import threading
+from contextlib import contextmanager
+from unittest import mock
+
+from django.contrib.auth import hashers
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from . import hashing
+
+CREATE_USER_URL = "/api/create/"
+TOKEN_URL = "/api/auth/"
+ADMIN_LOGIN_URL = "/admin/login/"
+
+
+# パスワードのハッシュ計算のテスト
+class HashingApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.algorithm = hashers.get_hasher().algorithm
+
+    # 作成したユーザーのパスワードが優先するハッシュ方式で保存されること
+    def test_14_01_should_hash_with_preferred_hasher(self):
+        payload = {"username": "newuser", "password": "newuser"}
+
+        res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        user = User.objects.get(username="newuser")
+        self.assertTrue(user.password.startswith(f"{self.algorithm}$"))
+        self.assertTrue(user.check_password("newuser"))
+
+    # 古いハッシュ方式のパスワードがログイン時に優先する方式で保存し直されること
+    def test_14_02_should_rehash_on_login(self):
+        password = hashers.make_password("olduser", hasher="pbkdf2_sha256")
+        user = User.objects.create(username="olduser", password=password)
+
+        res = self.client.post(
+            TOKEN_URL, {"username": "olduser", "password": "olduser"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith(f"{self.algorithm}$"))
+
+    # パスワードが誤っている場合は保存し直さないこと
+    def test_14_03_should_not_rehash_on_wrong_password(self):
+        password = hashers.make_password("olduser", hasher="pbkdf2_sha256")
+        User.objects.create(username="olduser", password=password)
+
+        res = self.client.post(TOKEN_URL, {"username": "olduser", "password": "wrong"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(User.objects.get(username="olduser").password, password)
+
+    # 計算中のハッシュ処理で待機数の上限に達した状態にする
+    @contextmanager
+    def busy_pool(self):
+        pool = hashing.HashingPool(workers=1, queue_size=0, retry_after=3)
+        started, release = threading.Event(), threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        thread = threading.Thread(target=pool.run, args=(block,))
+        thread.start()
+        started.wait(5)
+        try:
+            with mock.patch.object(hashing, "pool", pool):
+                yield
+        finally:
+            release.set()
+            thread.join()
+
+    # 待機数の上限に達した場合は503とRetry-Afterが返却されること
+    def test_14_04_should_reject_when_pool_is_busy(self):
+        with self.busy_pool():
+            res = self.client.post(
+                CREATE_USER_URL, {"username": "busy", "password": "busy"}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res["Retry-After"], "3")
+        self.assertFalse(User.objects.filter(username="busy").exists())
+
+    # DRF以外のビュー（管理画面のログイン）でも503とRetry-Afterが返却されること
+    def test_14_05_should_reject_admin_login_when_pool_is_busy(self):
+        User.objects.create_superuser(username="admin", password="admin")
+        with self.busy_pool():
+            res = self.client.post(
+                ADMIN_LOGIN_URL, {"username": "admin", "password": "admin"}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res["Retry-After"], "3")
@@ -0,0 +1,79 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from . import renderers
+from .models import Vehicle, Brand, Segment
+from .serializers import VehicleSerializer
+
+VEHICLES_URL = "/api/vehicles/"
+
+
+# JSONの出力形式のテスト
+class RendererTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testuser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        segment = Segment.objects.create(segment_name="SUV")
+        brand = Brand.objects.create(brand_name="トヨタ ")
+        for i in range(3):
+            Vehicle.objects.create(
+                user=self.user,
+                vehicle_name=f"MODEL {i}",
+                release_year=2019,
+                price=Decimal("500.10"),
+                segment=segment,
+                brand=brand,
+            )
+        self.data = {
+            "next": None,
+            "results": VehicleSerializer(Vehicle.objects.all(), many=True).data,
+        }
+
+    # JSONRendererと同じ内容で出力されること
+    def test_15_01_should_render_same_as_json_renderer(self):
+        expected = JSONRenderer().render(self.data)
+
+        self.assertEqual(renderers.FastJSONRenderer().render(self.data), expected)
+        # orjsonがない場合もJSONRendererと同じ
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(renderers.FastJSONRenderer().render(self.data), expected)
+
+    # Decimalは精度を落とさず文字列で出力されること
+    def test_15_02_should_render_decimal_as_string(self):
+        data = {"price": Decimal("12345678.90")}
+
+        self.assertEqual(
+            renderers.FastJSONRenderer().render(data), b'{"price":"12345678.90"}'
+        )
+
+    # Acceptで列形式を指定した場合は列名と値の配列で返却されること
+    def test_15_03_should_render_columnar(self):
+        res = self.client.get(VEHICLES_URL, HTTP_ACCEPT="application/vnd.columnar+json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/vnd.columnar+json")
+        data = res.json()
+        columns = list(self.data["results"][0])
+        self.assertEqual(data["columns"], columns)
+        self.assertEqual(
+            data["rows"],
+            [[row[column] for column in columns] for row in self.data["results"]],
+        )
+        self.assertIn("next", data)
+
+    # 一覧以外は通常のJSONで返却されること
+    def test_15_04_should_render_detail_as_json_in_columnar(self):
+        vehicle = Vehicle.objects.first()
+
+        res = self.client.get(
+            f"{VEHICLES_URL}{vehicle.pk}/", HTTP_ACCEPT="application/vnd.columnar+json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), VehicleSerializer(vehicle).data)
@@ -0,0 +1,88 @@
+import gzip
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from . import cache as response_cache
+from . import compression
+from .models import Vehicle, Brand, Segment
+
+VEHICLES_URL = "/api/vehicles/"
+SEGMENTS_URL = "/api/segments/"
+
+
+# レスポンスの圧縮のテスト
+class CompressionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testuser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        response_cache.get_cache().clear()
+        self.segment = Segment.objects.create(segment_name="SUV")
+        brand = Brand.objects.create(brand_name="Toyota")
+        Vehicle.objects.bulk_create(
+            Vehicle(
+                user=self.user,
+                vehicle_name=f"MODEL {i}",
+                release_year=2019,
+                price=500.00,
+                segment=self.segment,
+                brand=brand,
+            )
+            for i in range(50)
+        )
+
+    # 閾値以上のレスポンスはgzipで圧縮されること
+    def test_16_01_should_compress_large_response(self):
+        plain = self.client.get(VEHICLES_URL)
+
+        res = self.client.get(VEHICLES_URL, HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", res["Vary"])
+        self.assertLess(len(res.content), len(plain.content))
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+
+    # 閾値未満のレスポンス・圧縮を受け付けないクライアントには圧縮しないこと
+    def test_16_02_should_not_compress_small_response(self):
+        res = self.client.get(
+            f"{VEHICLES_URL}{Vehicle.objects.first().pk}/",
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertFalse(res.has_header("Content-Encoding"))
+
+        res = self.client.get(VEHICLES_URL, HTTP_ACCEPT_ENCODING="identity")
+        self.assertFalse(res.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", res["Vary"])
+
+    # キャッシュしたレスポンスは圧縮結果も再利用し、更新後は圧縮し直すこと
+    def test_16_03_should_reuse_precompressed_cached_response(self):
+        Segment.objects.bulk_create(
+            Segment(segment_name=f"SEGMENT {i}") for i in range(50)
+        )
+        with mock.patch.object(
+            compression, "compress", wraps=compression.compress
+        ) as compress:
+            first = self.client.get(SEGMENTS_URL, HTTP_ACCEPT_ENCODING="gzip")
+            second = self.client.get(SEGMENTS_URL, HTTP_ACCEPT_ENCODING="gzip")
+            self.assertEqual(compress.call_count, 1)
+            self.assertEqual(first.content, second.content)
+
+            self.client.patch(
+                f"{SEGMENTS_URL}{self.segment.pk}/", {"segment_name": "Sedan"}
+            )
+            res = self.client.get(SEGMENTS_URL, HTTP_ACCEPT_ENCODING="gzip")
+            self.assertEqual(compress.call_count, 2)
+
+        self.assertIn(b"Sedan", gzip.decompress(res.content))
+
+    # Accept-Encodingのq値に従って圧縮方式が選ばれること
+    def test_16_04_should_negotiate_encoding(self):
+        self.assertEqual(compression.negotiate("gzip;q=0.5"), "gzip")
+        self.assertEqual(compression.negotiate("*"), next(iter(compression.ENCODINGS)))
+        self.assertIsNone(compression.negotiate("gzip;q=0"))
+        self.assertIsNone(compression.negotiate("*;q=0.5, gzip;q=0, br;q=0, zstd;q=0"))
+        self.assertIsNone(compression.negotiate(""))
@@ -0,0 +1,75 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from .models import Segment, Brand, Vehicle
+
+VEHICLES_URL = "/api/vehicles/"
+STATS_URL = "/api/vehicles/stats/"
+
+
+# Vehicleをログインユーザーの範囲に限定するモードのテスト
+@override_settings(API_VEHICLE_SCOPE="user")
+class UserScopedVehicleApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testuser")
+        self.other = User.objects.create_user(username="other", password="other")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        segment = Segment.objects.create(segment_name="SUV")
+        brand = Brand.objects.create(brand_name="Toyota")
+        for user, count in ((self.user, 2), (self.other, 3)):
+            for i in range(count):
+                Vehicle.objects.create(
+                    user=user,
+                    vehicle_name=f"MODEL {i}",
+                    release_year=2019,
+                    price=500.00,
+                    segment=segment,
+                    brand=brand,
+                )
+        self.others_vehicle = Vehicle.objects.filter(user=self.other).first()
+
+    # 一覧・集計はログインユーザーのVehicleのみであること
+    def test_17_01_should_list_own_vehicles(self):
+        res = self.client.get(VEHICLES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        own = set(Vehicle.objects.filter(user=self.user).values_list("id", flat=True))
+        self.assertEqual({vehicle["id"] for vehicle in res.json()["results"]}, own)
+        self.assertEqual(self.client.get(STATS_URL).json()["summary"]["count"], 2)
+
+    # 他のユーザーのVehicleは取得・更新・削除できないこと
+    def test_17_02_should_not_access_others_vehicle(self):
+        url = f"{VEHICLES_URL}{self.others_vehicle.pk}/"
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        res = self.client.patch(url, {"vehicle_name": "CHANGED"})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(Vehicle.objects.filter(pk=self.others_vehicle.pk).exists())
+
+    # 同じURLでもユーザーごとに異なるETagになること
+    def test_17_03_should_scope_etag_to_user(self):
+        etag = self.client.get(VEHICLES_URL)["ETag"]
+
+        other_client = APIClient()
+        other_client.force_authenticate(user=self.other)
+        res = other_client.get(VEHICLES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    # ユーザーの一覧は(user, id)のインデックスで検索し、並び替えを行わないこと
+    def test_17_04_should_use_user_id_index(self):
+        out = StringIO()
+        call_command(
+            "explain_queries", VEHICLES_URL, "--username", "testuser", stdout=out
+        )
+
+        self.assertIn("SEARCH api_vehicle USING", out.getvalue())
+        self.assertNotIn("USE TEMP B-TREE", out.getvalue())
+        self.assertNotIn("! SCAN api_vehicle", out.getvalue())
@@ -0,0 +1,129 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from .models import Segment, Brand, Vehicle, TableVersion
+from .serializers import VehicleSerializer
+
+VEHICLES_URL = "/api/vehicles/"
+SEGMENTS_URL = "/api/segments/"
+BRANDS_URL = "/api/brands/"
+
+
+# Vehicleにコピーしたsegment_name/brand_nameのテスト
+class DenormalizedNameTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testuser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.segment = Segment.objects.create(segment_name="SUV")
+        self.brand = Brand.objects.create(brand_name="Toyota")
+        self.vehicle = Vehicle.objects.create(
+            user=self.user,
+            vehicle_name="RAV4",
+            release_year=2019,
+            price=500.00,
+            segment=self.segment,
+            brand=self.brand,
+        )
+
+    def names(self):
+        return list(
+            Vehicle.objects.order_by("id").values_list("segment_name", "brand_name")
+        )
+
+    # 登録・更新（1件・一括）時に名前がコピーされること
+    def test_18_01_should_copy_names_on_save(self):
+        sedan = Segment.objects.create(segment_name="Sedan")
+        self.assertEqual(self.names(), [("SUV", "Toyota")])
+
+        self.client.patch(f"{VEHICLES_URL}{self.vehicle.pk}/", {"segment": sedan.pk})
+        self.assertEqual(self.names(), [("Sedan", "Toyota")])
+
+        res = self.client.post(
+            f"{VEHICLES_URL}bulk/",
+            [
+                {
+                    "vehicle_name": "CROWN",
+                    "release_year": 2020,
+                    "price": 600.00,
+                    "segment": sedan.pk,
+                    "brand": self.brand.pk,
+                }
+            ],
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.json()["created"][0]["segment_name"], "Sedan")
+
+        self.client.patch(
+            f"{VEHICLES_URL}bulk/",
+            [{"id": self.vehicle.pk, "segment": self.segment.pk}],
+            format="json",
+        )
+        self.assertEqual(self.names(), [("SUV", "Toyota"), ("Sedan", "Toyota")])
+
+    # Segment・Brandの名前の変更（1件・一括）がVehicleに反映されること
+    def test_18_02_should_propagate_renames(self):
+        self.client.patch(f"{SEGMENTS_URL}{self.segment.pk}/", {"segment_name": "SUVs"})
+        self.assertEqual(self.names(), [("SUVs", "Toyota")])
+
+        res = self.client.patch(
+            f"{BRANDS_URL}bulk/",
+            [{"id": self.brand.pk, "brand_name": "TOYOTA"}],
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.names(), [("SUVs", "TOYOTA")])
+
+    # 有効にした場合はJOINせずにコピー列から同じ内容を返すこと
+    @override_settings(API_VEHICLE_DENORMALIZED_NAMES=True)
+    def test_18_03_should_read_names_without_join(self):
+        expected = {
+            **VehicleSerializer(self.vehicle).data,
+            "segment_name": "SUV",
+            "brand_name": "Toyota",
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(VEHICLES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["results"], [expected])
+        self.assertFalse([query for query in queries if "JOIN" in query["sql"].upper()])
+
+        stats = self.client.get(f"{VEHICLES_URL}stats/").json()
+        self.assertEqual(stats["segments"][0]["segment_name"], "SUV")
+        self.assertEqual(stats["brands"][0]["brand_name"], "Toyota")
+
+    # backfill_vehicle_namesで既存の行に名前が反映されること
+    def test_18_04_should_backfill_names(self):
+        Vehicle.objects.bulk_create(
+            Vehicle(
+                user=self.user,
+                vehicle_name=f"MODEL {i}",
+                release_year=2019,
+                price=500.00,
+                segment=self.segment,
+                brand=self.brand,
+            )
+            for i in range(4)
+        )
+        self.assertEqual(self.names()[1:], [(None, None)] * 4)
+        version = TableVersion.objects.get(table="api_vehicle").version
+
+        out = StringIO()
+        call_command(
+            "backfill_vehicle_names", "--batch-size", "2", "--missing-only", stdout=out
+        )
+
+        self.assertEqual(self.names(), [("SUV", "Toyota")] * 5)
+        self.assertIn("Updated 4 vehicles", out.getvalue())
+        # ETag・集計のキャッシュが無効になるようバージョンが進むこと
+        self.assertEqual(
+            TableVersion.objects.get(table="api_vehicle").version, version + 1
+        )
@@ -0,0 +1,148 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from . import search
+from .models import Segment, Brand, Vehicle
+
+SEARCH_URL = "/api/vehicles/search/"
+
+
+# Vehicleの全文検索のテスト
+class VehicleSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testuser")
+        self.other = User.objects.create_user(username="other", password="other")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.segment = Segment.objects.create(segment_name="SUV")
+        self.brand = Brand.objects.create(brand_name="Toyota")
+        self.vehicles = {
+            name: Vehicle.objects.create(
+                user=user,
+                vehicle_name=name,
+                release_year=2019,
+                price=500.00,
+                segment=self.segment,
+                brand=self.brand,
+            )
+            for name, user in (
+                ("MODEL S", self.user),
+                ("MODEL X", self.user),
+                ("PRIUS", self.other),
+            )
+        }
+
+    def search(self, query, **params):
+        res = self.client.get(SEARCH_URL, {"q": query, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.json()
+
+    def names(self, data):
+        return [vehicle["vehicle_name"] for vehicle in data["results"]]
+
+    # 各語の前方一致（大文字小文字を区別しない）で検索できること
+    def test_19_01_should_search_by_prefix(self):
+        data = self.search("mod")
+
+        self.assertEqual(sorted(self.names(data)), ["MODEL S", "MODEL X"])
+        self.assertEqual(
+            set(data["results"][0]),
+            {
+                "id",
+                "vehicle_name",
+                "release_year",
+                "price",
+                "segment",
+                "brand",
+                "segment_name",
+                "brand_name",
+            },
+        )
+        self.assertEqual(self.names(self.search("model x")), ["MODEL X"])
+        self.assertEqual(self.search("nothing")["results"], [])
+
+    # 車名の一致がSegment名・Brand名の一致より上位になること
+    def test_19_02_should_rank_vehicle_name_first(self):
+        brand = Brand.objects.create(brand_name="Prius Motors")
+        Vehicle.objects.create(
+            user=self.user,
+            vehicle_name="AQUA",
+            release_year=2020,
+            price=300.00,
+            segment=self.segment,
+            brand=brand,
+        )
+
+        self.assertEqual(self.names(self.search("prius")), ["PRIUS", "AQUA"])
+
+    # Vehicle・Segment・Brandの変更がインデックスに反映されること
+    def test_19_03_should_follow_writes(self):
+        vehicle = self.vehicles["MODEL S"]
+        self.client.patch(f"/api/vehicles/{vehicle.pk}/", {"vehicle_name": "CROWN"})
+        self.client.patch(
+            f"/api/segments/{self.segment.pk}/", {"segment_name": "Crossover"}
+        )
+
+        self.assertEqual(self.names(self.search("crown")), ["CROWN"])
+        self.assertEqual(len(self.search("cross toyota")["results"]), 3)
+
+        self.client.delete(f"/api/vehicles/{vehicle.pk}/")
+        self.assertEqual(self.search("crown")["results"], [])
+
+    # limit/offsetでページを取得できること
+    def test_19_04_should_paginate(self):
+        first = self.search("toyota", limit=2)
+        self.assertEqual(len(first["results"]), 2)
+        self.assertIsNone(first["previous"])
+
+        second = self.client.get(first["next"]).json()
+        self.assertEqual(len(second["results"]), 1)
+        self.assertIsNone(second["next"])
+        ids = [vehicle["id"] for vehicle in first["results"] + second["results"]]
+        self.assertEqual(sorted(ids), sorted(v.pk for v in self.vehicles.values()))
+
+    # ユーザーの範囲に限定する場合は他のユーザーのVehicleを返さないこと
+    @override_settings(API_VEHICLE_SCOPE="user")
+    def test_19_05_should_search_own_vehicles(self):
+        self.assertEqual(self.search("prius")["results"], [])
+        self.assertEqual(len(self.search("toyota")["results"]), 2)
+
+    # 検索語がない場合は400を返し、SQLite以外のDBでも検索できること
+    def test_19_06_should_validate_and_fall_back(self):
+        res = self.client.get(SEARCH_URL, {"q": ' *"- '})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with mock.patch.object(search, "connections") as connections:
+            connections.__getitem__.return_value.vendor = "postgresql"
+            data = self.search("model")
+        self.assertEqual(self.names(data), ["MODEL X", "MODEL S"])
+
+    # 多くの行に一致する語でも古い車名の一致が先頭になり、候補数の上限を超えてページを辿れること
+    @override_settings(API_SEARCH={"MAX_RESULTS": 1})
+    def test_19_07_should_rank_old_name_matches_and_paginate(self):
+        Vehicle.objects.filter(pk=self.vehicles["MODEL S"].pk).update(
+            vehicle_name="TOYOTA 86"
+        )
+        for name in ("AQUA", "CROWN", "YARIS"):
+            Vehicle.objects.create(
+                user=self.user,
+                vehicle_name=name,
+                release_year=2020,
+                price=300.00,
+                segment=self.segment,
+                brand=self.brand,
+            )
+
+        data = self.search("toyota", limit=2)
+        self.assertEqual(self.names(data), ["TOYOTA 86", "YARIS"])
+
+        ids = [vehicle["id"] for vehicle in data["results"]]
+        while data["next"]:
+            data = self.client.get(data["next"]).json()
+            ids += [vehicle["id"] for vehicle in data["results"]]
+        self.assertEqual(
+            sorted(ids), sorted(Vehicle.objects.values_list("id", flat=True))
+        )
@@ -0,0 +1,141 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from .models import Segment, Brand, Vehicle
+from .serializers import SegmentSerializer, BrandSerializer, VehicleSerializer
+
+VEHICLES_URL = "/api/vehicles/"
+
+
+# ?fields=・?expand=のテスト
+class VehicleFieldsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testuser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.segment = Segment.objects.create(segment_name="SUV")
+        self.brand = Brand.objects.create(brand_name="Toyota")
+        for i in range(5):
+            Vehicle.objects.create(
+                user=self.user,
+                vehicle_name=f"MODEL {i}",
+                release_year=2019,
+                price=500.00,
+                segment=self.segment,
+                brand=self.brand,
+            )
+
+    def vehicle_queries(self, queries):
+        return [query["sql"] for query in queries if '"api_vehicle"' in query["sql"]]
+
+    # 指定したフィールドのみを出力し、SQLも必要な列だけを読むこと
+    def test_20_01_should_select_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(VEHICLES_URL, {"fields": "id,vehicle_name"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        first = Vehicle.objects.order_by("id").first()
+        self.assertEqual(
+            res.json()["results"][0], {"id": first.pk, "vehicle_name": "MODEL 0"}
+        )
+        for sql in self.vehicle_queries(queries):
+            self.assertNotIn("JOIN", sql)
+            self.assertNotIn("price", sql)
+
+        # 出力しない列で並び替えてもページを辿れること
+        res = self.client.get(
+            VEHICLES_URL,
+            {"fields": "vehicle_name", "ordering": "-price", "page_size": 3},
+        )
+        names = [vehicle["vehicle_name"] for vehicle in res.json()["results"]]
+        res = self.client.get(res.json()["next"])
+        names += [vehicle["vehicle_name"] for vehicle in res.json()["results"]]
+        self.assertEqual(sorted(names), [f"MODEL {i}" for i in range(5)])
+
+    # 関連先のオブジェクトを埋め込み、行ごとのクエリが発生しないこと
+    def test_20_02_should_expand_related_objects(self):
+        with CaptureQueriesContext(connection) as plain:
+            self.client.get(VEHICLES_URL)
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(VEHICLES_URL, {"expand": "segment,brand"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        vehicle = res.json()["results"][0]
+        self.assertEqual(vehicle["segment"], SegmentSerializer(self.segment).data)
+        self.assertEqual(vehicle["brand"], BrandSerializer(self.brand).data)
+        self.assertEqual(list(vehicle)[:5], VehicleSerializer.Meta.fields[:5])
+        self.assertEqual(len(queries), len(plain))
+
+    # 詳細・エクスポートでも同じ指定ができ、シリアライザと同じ内容になること
+    def test_20_03_should_select_fields_on_detail_and_export(self):
+        vehicle = Vehicle.objects.first()
+        res = self.client.get(
+            f"{VEHICLES_URL}{vehicle.pk}/",
+            {"fields": "vehicle_name,price", "expand": "brand"},
+        )
+        expected = VehicleSerializer(
+            vehicle, context={"fields": ["vehicle_name", "price"], "expand": ["brand"]}
+        ).data
+        self.assertEqual(res.json(), expected)
+        self.assertEqual(list(res.json()), ["vehicle_name", "price", "brand"])
+
+        res = self.client.get(
+            f"{VEHICLES_URL}export/", {"type": "csv", "fields": "id,brand_name"}
+        )
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        self.assertEqual(lines[:2], ["id,brand_name", f"{vehicle.pk},Toyota"])
+
+        # CSVでは埋め込んだオブジェクトを関連先のフィールドごとの列にすること
+        res = self.client.get(
+            f"{VEHICLES_URL}export/",
+            {"type": "csv", "fields": "id", "expand": "segment"},
+        )
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        self.assertEqual(
+            lines[:2],
+            [
+                "id,segment.id,segment.segment_name",
+                f"{vehicle.pk},{self.segment.pk},SUV",
+            ],
+        )
+
+    # 存在しないフィールドは400を返し、書き込みのレスポンスには影響しないこと
+    def test_20_04_should_validate_fields(self):
+        res = self.client.get(VEHICLES_URL, {"fields": "id,owner"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.get(VEHICLES_URL, {"expand": "user"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(
+            f"{VEHICLES_URL}?fields=id",
+            {
+                "vehicle_name": "CROWN",
+                "release_year": 2020,
+                "price": 600.00,
+                "segment": self.segment.pk,
+                "brand": self.brand.pk,
+            },
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(list(res.json()), VehicleSerializer.Meta.fields)
+
+    # 検索でもidを出力しないフィールドを指定できること
+    def test_20_05_should_select_fields_on_search(self):
+        res = self.client.get(
+            f"{VEHICLES_URL}search/",
+            {"q": "model", "fields": "vehicle_name", "expand": "segment"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.json()["results"]
+        self.assertEqual(len(results), 5)
+        self.assertEqual(
+            results[0],
+            {
+                "vehicle_name": results[0]["vehicle_name"],
+                "segment": SegmentSerializer(self.segment).data,
+            },
+        )
@@ -0,0 +1,121 @@
+import threading
+import time
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+from . import idempotency
+from .models import Segment, Brand, Vehicle
+
+VEHICLES_URL = "/api/vehicles/"
+CREATE_USER_URL = "/api/create/"
+
+
+# Idempotency-Keyでの再送の重複防止のテスト
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        idempotency.store.clear()
+        self.user = User.objects.create_user(username="testuser", password="testuser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        segment = Segment.objects.create(segment_name="SUV")
+        brand = Brand.objects.create(brand_name="Toyota")
+        self.payload = {
+            "vehicle_name": "MODEL S",
+            "release_year": 2019,
+            "price": 500.00,
+            "segment": segment.pk,
+            "brand": brand.pk,
+        }
+
+    def post(self, client, url, data, key):
+        return client.post(url, data, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    # 同じキーの再送は登録せずに最初のレスポンスを返すこと
+    def test_21_01_should_replay_first_response(self):
+        first = self.post(self.client, VEHICLES_URL, self.payload, "key-1")
+        with self.assertNumQueries(0):
+            second = self.post(self.client, VEHICLES_URL, self.payload, "key-1")
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertFalse(first.has_header("Idempotent-Replayed"))
+        self.assertEqual(Vehicle.objects.count(), 1)
+
+        # キーがない場合・別のキーの場合は登録されること
+        self.client.post(VEHICLES_URL, self.payload, format="json")
+        self.post(self.client, VEHICLES_URL, self.payload, "key-2")
+        self.assertEqual(Vehicle.objects.count(), 3)
+
+    # 同じキーで内容が異なる場合は422、キーはユーザーごとに区別されること
+    def test_21_02_should_scope_key_to_request_and_user(self):
+        self.post(self.client, VEHICLES_URL, self.payload, "key-1")
+
+        res = self.post(
+            self.client, VEHICLES_URL, {**self.payload, "price": 600.00}, "key-1"
+        )
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        other = APIClient()
+        other.force_authenticate(
+            user=User.objects.create_user(username="other", password="other")
+        )
+        res = self.post(other, VEHICLES_URL, self.payload, "key-1")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Vehicle.objects.count(), 2)
+
+        res = self.post(self.client, VEHICLES_URL, self.payload, "x" * 256)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # ユーザー作成も再送で重複しないこと
+    def test_21_03_should_not_create_duplicate_user(self):
+        data = {"username": "newuser", "password": "newuser"}
+        first = self.post(APIClient(), CREATE_USER_URL, data, "signup-1")
+        second = self.post(APIClient(), CREATE_USER_URL, data, "signup-1")
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(User.objects.filter(username="newuser").count(), 1)
+
+    # 同じキーの同時リクエストは1件だけ処理し、他はそのレスポンスを返すこと
+    def test_21_04_should_collapse_concurrent_duplicates(self):
+        calls = []
+
+        def handler():
+            calls.append(1)
+            time.sleep(0.05)
+            return Response({"calls": len(calls)}, status=status.HTTP_201_CREATED)
+
+        def send(responses):
+            request = APIRequestFactory().post(
+                VEHICLES_URL, {"a": 1}, format="json", HTTP_IDEMPOTENCY_KEY="same"
+            )
+            request.user = AnonymousUser()
+            responses.append(idempotency.run(request, handler))
+
+        responses = []
+        threads = [threading.Thread(target=send, args=(responses,)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([res.data for res in responses], [{"calls": 1}] * 5)
+        self.assertEqual(len(idempotency.locks), 0)
+
+    # 処理中のキーを待ちきれない場合は409とRetry-Afterを返すこと
+    @override_settings(API_IDEMPOTENCY={"LOCK_TIMEOUT": 0.01})
+    def test_21_05_should_reject_while_in_progress(self):
+        key = f"{self.user.pk}:POST:{VEHICLES_URL}:busy"
+        with idempotency.locks.hold(key, 1):
+            res = self.post(self.client, VEHICLES_URL, self.payload, "busy")
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn("Retry-After", res)
+        self.assertEqual(Vehicle.objects.count(), 0)
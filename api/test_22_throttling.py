@@ -0,0 +1,139 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from . import throttling
+
+AUTH_URL = "/api/auth/"
+VEHICLES_URL = "/api/vehicles/"
+SEGMENTS_URL = "/api/segments/"
+METRICS_URL = "/api/metrics/"
+ASYNC_VEHICLES_URL = "/api/async/vehicles/"
+
+THROTTLE = {
+    "ENABLED": True,
+    "RATES": {"auth": "2/min", "vehicles": "3/min", "default": "100/min"},
+    "ROUTES": {
+        "api:auth": "auth",
+        "api:vehicle-list": "vehicles",
+        "api:async-vehicle-list": "vehicles",
+    },
+}
+
+
+# リクエスト数の制限・過負荷時の503のテスト
+class ThrottlingTests(TestCase):
+    def setUp(self):
+        throttling.buckets.clear()
+        self.user = User.objects.create_user(username="testuser", password="testuser")
+        self.client = self.token_client(self.user)
+
+    def tearDown(self):
+        throttling.buckets.clear()
+
+    def token_client(self, user):
+        client = APIClient()
+        token = Token.objects.create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        return client
+
+    # バケットの容量まで連続で受け付け、経過時間に応じて回復すること
+    def test_22_01_should_refill_token_bucket(self):
+        buckets = throttling.TokenBuckets(max_size=2)
+
+        self.assertEqual(buckets.take("a", 2, 1.0, now=0.0), 0)
+        self.assertEqual(buckets.take("a", 2, 1.0, now=0.0), 0)
+        self.assertEqual(buckets.take("a", 2, 1.0, now=0.0), 1.0)
+        self.assertEqual(buckets.take("a", 2, 1.0, now=0.5), 0.5)
+        self.assertEqual(buckets.take("a", 2, 1.0, now=1.5), 0)
+
+        # 最近使われていないバケットから削除されること
+        buckets.take("b", 2, 1.0, now=2.0)
+        buckets.take("c", 2, 1.0, now=2.0)
+        self.assertEqual(len(buckets), 2)
+        self.assertEqual(throttling.parse_rate("30/min"), (30, 0.5))
+
+    # 上限を超えたら429とRetry-Afterを返し、トークン・ルートごとに別に数えること
+    @override_settings(API_THROTTLE=THROTTLE)
+    def test_22_02_should_throttle_per_token_and_route(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get(VEHICLES_URL).status_code, 200)
+        res = self.client.get(VEHICLES_URL)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res["Retry-After"], "20")
+
+        # 同じトークンでも別のルートは別の上限
+        self.assertEqual(self.client.get(SEGMENTS_URL).status_code, 200)
+        # 別のトークンは別の上限
+        other = self.token_client(
+            User.objects.create_user(username="other", password="other")
+        )
+        self.assertEqual(other.get(VEHICLES_URL).status_code, 200)
+
+    # トークン取得（パスワードの検証）も未認証のクライアントごとに制限されること
+    @override_settings(API_THROTTLE=THROTTLE)
+    def test_22_03_should_throttle_auth(self):
+        data = {"username": "testuser", "password": "testuser"}
+        client = APIClient()
+        for _ in range(2):
+            self.assertEqual(client.post(AUTH_URL, data).status_code, 200)
+        res = client.post(AUTH_URL, data)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        res = client.post(AUTH_URL, data, REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with override_settings(API_THROTTLE={**THROTTLE, "ENABLED": False}):
+            self.assertEqual(client.post(AUTH_URL, data).status_code, 200)
+
+    # 処理中のリクエストが上限に達したら503とRetry-Afterを返すこと（監視用のパスは除く）
+    def test_22_04_should_shed_load(self):
+        self.client.get(SEGMENTS_URL)
+        self.assertEqual(throttling.in_flight.count, 0)
+
+        options = {"MAX_IN_FLIGHT": 1, "RETRY_AFTER": 2, "EXEMPT_PATHS": [METRICS_URL]}
+        admin = User.objects.create_superuser(username="admin", password="admin")
+        admin_client = self.token_client(admin)
+        with override_settings(API_LOAD_SHEDDING=options):
+            # 処理中のリクエストが1件ある状態
+            self.assertTrue(throttling.in_flight.enter(1))
+            try:
+                res = self.client.get(SEGMENTS_URL)
+                metrics = admin_client.get(METRICS_URL)
+            finally:
+                throttling.in_flight.leave()
+
+            self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertEqual(res["Retry-After"], "2")
+            self.assertEqual(metrics.status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get(SEGMENTS_URL).status_code, 200)
+
+    # DRFを通らない非同期の一覧も同じ上限で制限されること
+    @override_settings(API_THROTTLE=THROTTLE)
+    def test_22_05_should_throttle_async_views(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get(ASYNC_VEHICLES_URL).status_code, 200)
+        res = self.client.get(ASYNC_VEHICLES_URL)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res["Retry-After"], "20")
+
+        # 別のトークンは別の上限
+        other = self.token_client(
+            User.objects.create_user(username="other", password="other")
+        )
+        self.assertEqual(other.get(ASYNC_VEHICLES_URL).status_code, 200)
+
+    # ストリーミングのレスポンスは出力し終えるまで処理中として数えること
+    def test_22_06_should_count_streaming_response_until_closed(self):
+        options = {"MAX_IN_FLIGHT": 1, "RETRY_AFTER": 1, "EXEMPT_PATHS": []}
+        with override_settings(API_LOAD_SHEDDING=options):
+            res = self.client.get(f"{VEHICLES_URL}export/")
+            self.assertEqual(throttling.in_flight.count, 1)
+            busy = self.client.get(SEGMENTS_URL)
+
+            b"".join(res.streaming_content)
+            self.assertEqual(throttling.in_flight.count, 0)
+            self.assertEqual(self.client.get(SEGMENTS_URL).status_code, 200)
+
+        self.assertEqual(busy.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
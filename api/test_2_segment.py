@@ -42,7 +42,7 @@ class AuthorizedSegmentApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
         # リクエストして取得した全てのデータがDBに登録されたデータと一致していること
-        self.assertEqual(res.json(), serializer.data)
+        self.assertEqual(res.json()["results"], serializer.data)
 
     # APIにGETをリクエストして取得した単独のデータがDBに登録されたデータと一致していること
     def test_2_02_should_get_single_segment(self):
@@ -129,6 +129,21 @@ class AuthorizedSegmentApiTests(TestCase):
         # 削除したセグメントの数量が1であること
         self.assertEqual(0, Segment.objects.count())
 
+    # APIに配列をPOSTするとセグメントが一括作成されること
+    def test_2_13_should_bulk_create_segments(self):
+        payload = [{"segment_name": "SUV"}, {"segment_name": ""}, {"segment_name": "Sedan"}]
+        res = self.client.post(f"{SEGMENT_URL}bulk/", payload, format="json")
+
+        # APIを実行したらスタータスコード201が返却されること
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        # 正常なセグメントのみ作成され、エラー行のindexが返却されること
+        self.assertEqual(
+            list(Segment.objects.order_by("id").values_list("segment_name", flat=True)),
+            ["SUV", "Sedan"],
+        )
+        self.assertEqual([error["index"] for error in res.json()["errors"]], [1])
+
 
 # セグメントのテスト（認証なし）
 class UnauthorizedSegmentApiTests(TestCase):
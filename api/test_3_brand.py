@@ -42,7 +42,7 @@ class AuthorizedBrandApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
         # リクエストして取得した全てのデータがDBに登録されたデータと一致していること
-        self.assertEqual(res.json(), serializer.data)
+        self.assertEqual(res.json()["results"], serializer.data)
 
     # APIにGETをリクエストして取得した単独のデータがDBに登録されたデータと一致していること
     def test_3_02_should_get_single_brand(self):
@@ -1,15 +1,26 @@
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.test import TestCase
-from rest_framework import status
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import permissions, status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 from .models import Vehicle, Brand, Segment
 from .serializers import VehicleSerializer
+from .views import VehicleViewSet
 from decimal import Decimal
+import csv
+import io
+import json
+from unittest import mock
 
 SEGMENTS_URL = "/api/segments/"
 BRANDS_URL = "/api/brands/"
 VEHICLES_URL = "/api/vehicles/"
+EXPORT_URL = "/api/vehicles/export/"
+BULK_URL = "/api/vehicles/bulk/"
+STATS_URL = "/api/vehicles/stats/"
 
 
 def create_segment(segment_name):
@@ -68,7 +79,7 @@ class AuthorizedVehicleApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
         # APIで取得したすべてのデータが登録されたデータと一致していること
-        self.assertEqual(res.json(), seriarizer.data)
+        self.assertEqual(res.json()["results"], seriarizer.data)
 
     # APIで取得したデータが登録されたデータと一致していること
     def test_4_02_get_sinble_vechiles(self):
@@ -232,6 +243,354 @@ class AuthorizedVehicleApiTests(TestCase):
         # Brandを削除した後はVehicleにデータが存在しないこと
         self.assertEqual(0, Vehicle.objects.count())
 
+    # Vehicleの件数が増えても一覧取得のクエリ数が変わらないこと（N+1が発生しないこと）
+    def test_4_14_should_get_vehicles_with_constant_queries(self):
+        segment = Segment.objects.create(segment_name="SUV")
+        brand = Brand.objects.create(brand_name="Toyota")
+
+        def query_count(total):
+            Vehicle.objects.bulk_create(
+                Vehicle(
+                    user=self.user,
+                    vehicle_name=f"MODEL {i}",
+                    release_year=2019,
+                    price=500.00,
+                    segment=segment,
+                    brand=brand,
+                )
+                for i in range(total - Vehicle.objects.count())
+            )
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.get(VEHICLES_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            return len(ctx.captured_queries)
+
+        # 10件と10,000件でクエリ数が一致していること
+        self.assertEqual(query_count(10), query_count(10000))
+
+    # page_size毎にカーソルで全件を重複なく取得できること
+    def test_4_15_should_paginate_vehicles_by_cursor(self):
+        segment = Segment.objects.create(segment_name="SUV")
+        brand = Brand.objects.create(brand_name="Toyota")
+        for _ in range(5):
+            create_vehicle(user=self.user, segment=segment, brand=brand)
+
+        ids = []
+        url = f"{VEHICLES_URL}?page_size=2"
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.json()["results"]), 2)
+            ids += [vehicle["id"] for vehicle in res.json()["results"]]
+            url = res.json()["next"]
+
+        # id順に全件取得できていること
+        expected = list(Vehicle.objects.order_by("id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+    # NDJSONでエクスポートした内容がVehicleSerializerの出力と一致していること
+    def test_4_16_should_export_vehicles_as_ndjson(self):
+        segment = Segment.objects.create(segment_name="SUV")
+        brand = Brand.objects.create(brand_name="Toyota")
+        create_vehicle(user=self.user, segment=segment, brand=brand)
+        create_vehicle(user=self.user, segment=segment, brand=brand)
+
+        res = self.client.get(EXPORT_URL)
+        content = b"".join(res.streaming_content).decode()
+        vehicles = Vehicle.objects.all().order_by("id")
+        seriarizer = VehicleSerializer(vehicles, many=True)
+
+        # ステータスコード200と一致していること
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+
+        # 1行ずつのJSONがシリアライズしたデータと一致していること
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(rows, seriarizer.data)
+
+    # CSVでエクスポートした内容がヘッダーと行データを含んでいること
+    def test_4_17_should_export_vehicles_as_csv(self):
+        segment = Segment.objects.create(segment_name="SUV")
+        brand = Brand.objects.create(brand_name="Toyota")
+        vehicle = create_vehicle(user=self.user, segment=segment, brand=brand)
+
+        res = self.client.get(EXPORT_URL, {"type": "csv"})
+        content = b"".join(res.streaming_content).decode()
+        rows = list(csv.reader(io.StringIO(content)))
+
+        # ステータスコード200と一致していること
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        # ヘッダーがVehicleSerializerのフィールドと一致していること
+        self.assertEqual(rows[0], VehicleSerializer.Meta.fields)
+        self.assertEqual(
+            rows[1],
+            [str(vehicle.pk), "MODEL S", "2019", "500.00"]
+            + [str(segment.pk), str(brand.pk), "SUV", "Toyota"],
+        )
+
+    # 未対応の形式を指定した場合はエラーになること
+    def test_4_18_should_not_export_vehicles_with_invalid_type(self):
+        res = self.client.get(EXPORT_URL, {"type": "xml"})
+
+        # ステータスコード400と一致していること
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # 一括登録で正常な行だけが登録され、エラー行はindex付きで返されること
+    def test_4_19_should_bulk_create_vehicles(self):
+        segment = Segment.objects.create(segment_name="SUV")
+        brand = Brand.objects.create(brand_name="Toyota")
+        payload = [
+            {
+                "vehicle_name": f"MODEL {i}",
+                "release_year": 2019,
+                "price": 500.00,
+                "segment": segment.pk,
+                "brand": brand.pk,
+            }
+            for i in range(3)
+        ]
+        payload.insert(1, {"vehicle_name": "MODEL X", "segment": "", "brand": ""})
+
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        # ステータスコード201と一致していること
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        # 正常な3件が登録ユーザー付きで登録されていること
+        self.assertEqual(len(res.json()["created"]), 3)
+        self.assertEqual(3, Vehicle.objects.filter(user=self.user).count())
+        self.assertEqual(res.json()["created"][0]["segment_name"], "SUV")
+
+        # エラー行のindexが返されること
+        self.assertEqual([error["index"] for error in res.json()["errors"]], [1])
+
+    # 一括更新で指定したidのデータが更新されること
+    def test_4_20_should_bulk_update_vehicles(self):
+        segment = Segment.objects.create(segment_name="SUV")
+        brand = Brand.objects.create(brand_name="Toyota")
+        vehicle1 = create_vehicle(user=self.user, segment=segment, brand=brand)
+        vehicle2 = create_vehicle(user=self.user, segment=segment, brand=brand)
+        payload = [
+            {"id": vehicle1.pk, "vehicle_name": "MODEL SS"},
+            {"id": vehicle2.pk, "release_year": 2020},
+            {"id": 0, "release_year": 2020},
+        ]
+
+        res = self.client.patch(BULK_URL, payload, format="json")
+        vehicle1.refresh_from_db()
+        vehicle2.refresh_from_db()
+
+        # ステータスコード200と一致していること
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        # 更新した内容が一致していること
+        self.assertEqual(vehicle1.vehicle_name, "MODEL SS")
+        self.assertEqual(vehicle2.release_year, 2020)
+
+        # 存在しないidはエラーとして返されること
+        self.assertEqual([error["index"] for error in res.json()["errors"]], [2])
+
+    # 一括削除で指定したidのデータが削除されること
+    def test_4_21_should_bulk_delete_vehicles(self):
+        segment = Segment.objects.create(segment_name="SUV")
+        brand = Brand.objects.create(brand_name="Toyota")
+        vehicle1 = create_vehicle(user=self.user, segment=segment, brand=brand)
+        vehicle2 = create_vehicle(user=self.user, segment=segment, brand=brand)
+        vehicle3 = create_vehicle(user=self.user, segment=segment, brand=brand)
+
+        res = self.client.delete(
+            BULK_URL, {"ids": [vehicle1.pk, vehicle2.pk]}, format="json"
+        )
+
+        # ステータスコード200と一致していること
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        # 指定したデータのみ削除されていること
+        self.assertEqual(
+            list(Vehicle.objects.values_list("id", flat=True)), [vehicle3.pk]
+        )
+
+    # ブランド・セグメント・年式・価格で絞り込めること
+    def test_4_22_should_filter_vehicles(self):
+        suv = Segment.objects.create(segment_name="SUV")
+        sedan = Segment.objects.create(segment_name="Sedan")
+        toyota = Brand.objects.create(brand_name="Toyota")
+        honda = Brand.objects.create(brand_name="Honda")
+        match = create_vehicle(
+            user=self.user, segment=suv, brand=toyota, release_year=2020, price=300
+        )
+        create_vehicle(user=self.user, segment=suv, brand=toyota, release_year=2017)
+        create_vehicle(user=self.user, segment=suv, brand=toyota, price=450)
+        create_vehicle(user=self.user, segment=sedan, brand=toyota, price=300)
+        create_vehicle(user=self.user, segment=suv, brand=honda, price=300)
+
+        res = self.client.get(
+            VEHICLES_URL,
+            {
+                "brand": toyota.pk,
+                "segment": suv.pk,
+                "release_year_min": 2018,
+                "release_year_max": 2022,
+                "price_max": 400,
+            },
+        )
+
+        # 条件に一致するデータのみ取得できること
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([v["id"] for v in res.json()["results"]], [match.pk])
+
+    # 許可された列で並び替えができ、ページをまたいでも順序が保たれること
+    def test_4_23_should_order_vehicles(self):
+        segment = Segment.objects.create(segment_name="SUV")
+        brand = Brand.objects.create(brand_name="Toyota")
+        for year in (2020, 2018, 2021, 2018, 2019):
+            create_vehicle(
+                user=self.user, segment=segment, brand=brand, release_year=year
+            )
+
+        years = []
+        url = f"{VEHICLES_URL}?ordering=-release_year&page_size=2"
+        while url:
+            res = self.client.get(url)
+            years += [vehicle["release_year"] for vehicle in res.json()["results"]]
+            url = res.json()["next"]
+
+        # 年式の降順で全件取得できること
+        self.assertEqual(years, [2021, 2020, 2019, 2018, 2018])
+
+    # 許可されていない列での並び替え・不正な値での絞り込みはエラーになること
+    def test_4_24_should_not_filter_vehicles_with_invalid_params(self):
+        res = self.client.get(VEHICLES_URL, {"ordering": "segment__segment_name"})
+
+        # ステータスコード400と一致していること
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(VEHICLES_URL, {"ordering": "--price"})
+
+        # ステータスコード400と一致していること
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(VEHICLES_URL, {"release_year_min": "abc"})
+
+        # ステータスコード400と一致していること
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # 件数・価格・年式ごとの件数がSegment別・Brand別に集計されること
+    def test_4_25_should_get_vehicle_stats(self):
+        suv = Segment.objects.create(segment_name="SUV")
+        sedan = Segment.objects.create(segment_name="Sedan")
+        brand = Brand.objects.create(brand_name="Toyota")
+        create_vehicle(user=self.user, segment=suv, brand=brand, price=300)
+        create_vehicle(user=self.user, segment=suv, brand=brand, price=400.5)
+        create_vehicle(
+            user=self.user, segment=sedan, brand=brand, price=200, release_year=2020
+        )
+
+        res = self.client.get(STATS_URL)
+
+        # ステータスコード200と一致していること
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        # 全体の集計が一致していること
+        summary = res.json()["summary"]
+        self.assertEqual(summary["count"], 3)
+        self.assertEqual(summary["avg_price"], "300.17")
+        self.assertEqual(summary["min_price"], "200.00")
+        self.assertEqual(summary["max_price"], "400.50")
+        self.assertEqual(summary["release_years"], {"2019": 2, "2020": 1})
+
+        # Segment別の集計が一致していること
+        self.assertEqual(
+            res.json()["segments"],
+            [
+                {
+                    "id": suv.pk,
+                    "segment_name": "SUV",
+                    "count": 2,
+                    "avg_price": "350.25",
+                    "min_price": "300.00",
+                    "max_price": "400.50",
+                    "release_years": {"2019": 2},
+                },
+                {
+                    "id": sedan.pk,
+                    "segment_name": "Sedan",
+                    "count": 1,
+                    "avg_price": "200.00",
+                    "min_price": "200.00",
+                    "max_price": "200.00",
+                    "release_years": {"2020": 1},
+                },
+            ],
+        )
+        self.assertEqual(res.json()["brands"][0]["count"], 3)
+
+    # 集計結果はキャッシュされ、Vehicleを追加すると再集計されること
+    def test_4_26_should_cache_vehicle_stats_until_vehicle_write(self):
+        segment = Segment.objects.create(segment_name="SUV")
+        brand = Brand.objects.create(brand_name="Toyota")
+        create_vehicle(user=self.user, segment=segment, brand=brand)
+        self.client.get(STATS_URL)
+
+        # 2回目はVehicleテーブルを集計しないこと
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(STATS_URL)
+        self.assertFalse(
+            any('FROM "api_vehicle"' in query["sql"] for query in ctx.captured_queries)
+        )
+        self.assertEqual(res.json()["summary"]["count"], 1)
+
+        create_vehicle(user=self.user, segment=segment, brand=brand)
+        res = self.client.get(STATS_URL)
+
+        # 追加後の件数で集計されること
+        self.assertEqual(res.json()["summary"]["count"], 2)
+
+    # 一覧・1件取得の出力がVehicleSerializer（JSONRenderer）とバイト単位で一致すること
+    def test_4_27_should_render_same_bytes_as_vehicle_serializer(self):
+        segment = Segment.objects.create(segment_name="SUV")
+        brand = Brand.objects.create(brand_name="トヨタ")
+        for price in ("0.5", "1234.56", "9999.99"):
+            create_vehicle(
+                user=self.user, segment=segment, brand=brand, price=Decimal(price)
+            )
+        vehicles = Vehicle.objects.select_related("segment", "brand").order_by("id")
+        renderer = JSONRenderer()
+
+        res = self.client.get(VEHICLES_URL)
+        expected = VehicleSerializer(vehicles, many=True).data
+        self.assertEqual(
+            res.content,
+            renderer.render({"next": None, "previous": None, "results": expected}),
+        )
+
+        res = self.client.get(f"{VEHICLES_URL}{vehicles[0].pk}/")
+        expected = VehicleSerializer(vehicles[0]).data
+        self.assertEqual(res.content, renderer.render(expected))
+
+    # オブジェクト単位の権限がある場合は1件取得でも確認されること
+    def test_4_28_should_check_object_permissions_on_retrieve(self):
+        class IsOwner(permissions.BasePermission):
+            def has_object_permission(self, request, view, obj):
+                return obj.user == request.user
+
+        segment = Segment.objects.create(segment_name="SUV")
+        brand = Brand.objects.create(brand_name="Toyota")
+        other = User.objects.create_user(username="other", password="other")
+        vehicle = create_vehicle(user=other, segment=segment, brand=brand)
+        own = create_vehicle(user=self.user, segment=segment, brand=brand)
+        permission_classes = [permissions.IsAuthenticated, IsOwner]
+        with mock.patch.object(
+            VehicleViewSet, "permission_classes", permission_classes
+        ):
+            res = self.client.get(detail_vehicle_url(vehicle.pk))
+            own = self.client.get(detail_vehicle_url(own.pk))
+
+        # ステータスコード403と一致していること
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(own.status_code, status.HTTP_200_OK)
+
 
 # 認証していない場合
 class UnauthorizedVehicleApiTests(TestCase):
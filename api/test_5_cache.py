@@ -0,0 +1,104 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from .models import Segment
+from . import cache as response_cache
+
+SEGMENT_URL = "/api/segments/"
+BRAND_URL = "/api/brands/"
+CACHE_STATS_URL = "/api/cache/stats/"
+
+
+# レスポンスキャッシュのテスト
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        username = "testuser"
+        password = "testuser"
+        self.user = User.objects.create_user(username=username, password=password)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        response_cache.get_cache().clear()
+        response_cache.reset_stats()
+
+    # 2回目のGETはSegmentテーブルにアクセスせずキャッシュから返却されること
+    def test_5_01_should_get_segments_from_cache(self):
+        Segment.objects.create(segment_name="SUV")
+        first = self.client.get(SEGMENT_URL)
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(SEGMENT_URL)
+
+        # キャッシュから返却された内容が1回目と一致していること
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.json(), first.json())
+        self.assertFalse(
+            any('FROM "api_segment"' in query["sql"] for query in ctx.captured_queries)
+        )
+
+        # ヒット・ミスがカウントされていること
+        self.assertEqual(
+            response_cache.cache_stats()["segments"],
+            {"hits": 1, "misses": 1, "invalidations": 1},
+        )
+
+    # APIから更新した場合はキャッシュが無効化されること
+    def test_5_02_should_invalidate_cache_on_api_write(self):
+        self.client.get(BRAND_URL)
+        self.client.post(BRAND_URL, {"brand_name": "Toyota"})
+        res = self.client.get(BRAND_URL)
+
+        # 追加したブランドが取得できること
+        self.assertEqual(
+            [brand["brand_name"] for brand in res.json()["results"]], ["Toyota"]
+        )
+
+    # 一括登録した場合もキャッシュが無効化されること
+    def test_5_03_should_invalidate_cache_on_bulk_write(self):
+        self.client.get(SEGMENT_URL)
+        self.client.post(
+            f"{SEGMENT_URL}bulk/", [{"segment_name": "SUV"}], format="json"
+        )
+        res = self.client.get(SEGMENT_URL)
+
+        # 一括登録したセグメントが取得できること
+        self.assertEqual(len(res.json()["results"]), 1)
+
+    # ORM（管理画面など）から変更した場合もキャッシュが無効化されること
+    def test_5_04_should_invalidate_cache_on_orm_write(self):
+        segment = Segment.objects.create(segment_name="SUV")
+        url = f"{SEGMENT_URL}{segment.pk}/"
+        self.client.get(url)
+
+        segment.segment_name = "Sedan"
+        segment.save()
+        res = self.client.get(url)
+
+        # 変更後の内容が取得できること
+        self.assertEqual(res.json()["segment_name"], "Sedan")
+
+        segment.delete()
+        res = self.client.get(url)
+
+        # 削除後は404が返却されること
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    # 管理者以外はキャッシュの統計を取得できないこと
+    def test_5_05_should_not_get_cache_stats_without_admin(self):
+        res = self.client.get(CACHE_STATS_URL)
+
+        # ステータスコード403と一致していること
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    # 管理者はキャッシュの統計を取得できること
+    def test_5_06_should_get_cache_stats_with_admin(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get(SEGMENT_URL)
+        res = self.client.get(CACHE_STATS_URL)
+
+        # ステータスコード200と一致し、ミスが記録されていること
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["segments"]["misses"], 1)
@@ -0,0 +1,127 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from .models import Segment, Brand, Vehicle, TableVersion
+
+SEGMENT_URL = "/api/segments/"
+VEHICLES_URL = "/api/vehicles/"
+
+
+# ETag/Last-Modifiedによる条件付きGETのテスト
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        username = "testuser"
+        password = "testuser"
+        self.user = User.objects.create_user(username=username, password=password)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.segment = Segment.objects.create(segment_name="SUV")
+        self.brand = Brand.objects.create(brand_name="Toyota")
+        self.vehicle = Vehicle.objects.create(
+            user=self.user,
+            vehicle_name="MODEL S",
+            release_year=2019,
+            price=500.00,
+            segment=self.segment,
+            brand=self.brand,
+        )
+
+    # 変更がなければIf-None-Matchに304が返却されること
+    def test_6_01_should_return_not_modified_with_same_etag(self):
+        res = self.client.get(VEHICLES_URL)
+        self.assertIn("ETag", res)
+        self.assertIn("Last-Modified", res)
+
+        res = self.client.get(VEHICLES_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        # ステータスコード304と一致し、本文が空であること
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+
+    # Vehicleを更新するとETagが変わること
+    def test_6_02_should_change_etag_after_vehicle_update(self):
+        etag = self.client.get(VEHICLES_URL)["ETag"]
+        self.client.patch(f"{VEHICLES_URL}{self.vehicle.pk}/", {"price": 400.00})
+
+        res = self.client.get(VEHICLES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        # ステータスコード200と一致し、新しいETagが返却されること
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    # Segment名を変更するとVehicleのETagも変わること
+    def test_6_03_should_change_vehicle_etag_after_segment_rename(self):
+        etag = self.client.get(VEHICLES_URL)["ETag"]
+        self.segment.segment_name = "Sedan"
+        self.segment.save()
+
+        res = self.client.get(VEHICLES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        # 新しいセグメント名が返却されること
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["results"][0]["segment_name"], "Sedan")
+
+    # 一括登録（シグナルなし）でもETagが変わること
+    def test_6_04_should_change_etag_after_bulk_create(self):
+        etag = self.client.get(SEGMENT_URL)["ETag"]
+        self.client.post(
+            f"{SEGMENT_URL}bulk/", [{"segment_name": "Sedan"}], format="json"
+        )
+
+        res = self.client.get(SEGMENT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        # ステータスコード200と一致していること
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    # If-Modified-Sinceが最終更新日時以降なら304が返却されること
+    def test_6_05_should_return_not_modified_with_if_modified_since(self):
+        res = self.client.get(f"{VEHICLES_URL}{self.vehicle.pk}/")
+
+        res = self.client.get(
+            f"{VEHICLES_URL}{self.vehicle.pk}/",
+            HTTP_IF_MODIFIED_SINCE=res["Last-Modified"],
+        )
+
+        # ステータスコード304と一致していること
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    # カスケード削除でもバージョンの更新は1回のみであること
+    def test_6_06_should_bump_version_once_on_cascade_delete(self):
+        for _ in range(3):
+            Vehicle.objects.create(
+                user=self.user,
+                vehicle_name="MODEL S",
+                release_year=2019,
+                price=500.00,
+                segment=self.segment,
+                brand=self.brand,
+            )
+        version = TableVersion.objects.get(table="api_vehicle").version
+        self.segment.delete()
+
+        # Vehicleのバージョンが1つだけ進んでいること
+        self.assertEqual(
+            TableVersion.objects.get(table="api_vehicle").version, version + 1
+        )
+
+    # 同じQuerySetで再度削除した場合もバージョンが進むこと
+    def test_6_07_should_bump_version_on_each_delete(self):
+        queryset = Vehicle.objects.filter(vehicle_name="MODEL S")
+        queryset.delete()
+        version = TableVersion.objects.get(table="api_vehicle").version
+
+        Vehicle.objects.create(
+            user=self.user,
+            vehicle_name="MODEL S",
+            release_year=2019,
+            price=500.00,
+            segment=self.segment,
+            brand=self.brand,
+        )
+        queryset.delete()
+
+        # 作成・削除でそれぞれ1つずつ進んでいること
+        self.assertEqual(
+            TableVersion.objects.get(table="api_vehicle").version, version + 2
+        )
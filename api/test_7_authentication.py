@@ -0,0 +1,88 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from .authentication import CachingTokenAuthentication, token_cache
+from .lru import LRUCache
+
+PROFILE_URL = "/api/profile/"
+
+
+# トークン認証キャッシュのテスト
+class CachingTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        username = "testuser"
+        password = "testuser"
+        self.user = User.objects.create_user(username=username, password=password)
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        token_cache.clear()
+
+    # 2回目以降の認証ではDBにアクセスしないこと
+    def test_7_01_should_authenticate_from_cache(self):
+        self.client.get(PROFILE_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(PROFILE_URL)
+
+        # ステータスコード200と一致し、ログインユーザーが返却されること
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["username"], "testuser")
+
+    # トークンを削除したら認証できないこと
+    def test_7_02_should_not_authenticate_after_token_delete(self):
+        self.client.get(PROFILE_URL)
+        self.token.delete()
+
+        res = self.client.get(PROFILE_URL)
+
+        # ステータスコード401と一致していること
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    # ユーザーを無効化したら認証できないこと
+    def test_7_03_should_not_authenticate_after_user_deactivate(self):
+        self.client.get(PROFILE_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(PROFILE_URL)
+
+        # ステータスコード401と一致していること
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    # キャッシュから返すユーザーはリクエストごとに別のインスタンスであること
+    def test_7_06_should_not_share_cached_user_between_requests(self):
+        authentication = CachingTokenAuthentication()
+        first, _ = authentication.authenticate_credentials(self.token.key)
+        first.first_name = "changed"
+
+        with self.assertNumQueries(0):
+            user, token = authentication.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.first_name, "")
+        self.assertIs(token.user, user)
+
+
+# LRUキャッシュのテスト
+class LRUCacheTests(TestCase):
+    # 上限を超えたら最も使われていない要素が削除されること
+    def test_7_04_should_evict_least_recently_used(self):
+        cache = LRUCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    # 有効期限が切れた要素は取得できないこと
+    def test_7_05_should_expire_after_ttl(self):
+        cache = LRUCache(max_size=2, ttl=0)
+        cache.set("a", 1)
+
+        self.assertIsNone(cache.get("a"))
@@ -0,0 +1,65 @@
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from .management.commands.explain_queries import Command
+from .models import Segment, Brand, Vehicle
+
+
+# explain_queriesコマンドのテスト
+class ExplainQueriesCommandTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testuser")
+        segment = Segment.objects.create(segment_name="SUV")
+        brand = Brand.objects.create(brand_name="Toyota")
+        self.vehicle = Vehicle.objects.create(
+            user=self.user,
+            vehicle_name="MODEL S",
+            release_year=2019,
+            price=500.00,
+            segment=segment,
+            brand=brand,
+        )
+
+    def explain(self, *args):
+        out = StringIO()
+        call_command("explain_queries", *args, stdout=out)
+        return out.getvalue()
+
+    # 詳細取得は主キーで検索されること
+    def test_8_01_should_explain_detail_query(self):
+        output = self.explain(f"/api/vehicles/{self.vehicle.pk}/")
+
+        self.assertIn("SEARCH api_vehicle USING INTEGER PRIMARY KEY", output)
+        self.assertNotIn("!", output)
+
+    # ユーザーで絞り込んだ場合は(user, id)のインデックスが使われること
+    # （外部キーの単独のインデックスは作成しない）
+    def test_8_02_should_use_user_id_index(self):
+        queryset = Vehicle.objects.filter(user=self.user).order_by("id")
+
+        plan = queryset.explain()
+        self.assertIn(
+            "SEARCH api_vehicle USING INDEX vehicle_user_id_idx (user_id=?)", plan
+        )
+        self.assertNotIn("USE TEMP B-TREE", plan)
+
+    # 既定のエンドポイント（絞り込み・並び替えを含む）でフルスキャンが発生しないこと
+    # （一覧の先頭ページはidの順にLIMIT件だけ読むため問題として数えない）
+    def test_8_03_should_not_scan_vehicles_on_default_paths(self):
+        output = self.explain("--fail-on-scan")
+
+        self.assertIn("vehicle_brand_year_idx", output)
+        self.assertIn("vehicle_price_idx", output)
+        self.assertIn("SCAN api_vehicle (bounded by LIMIT, id order)", output)
+        self.assertNotIn("! SCAN api_vehicle", output)
+        self.assertNotIn("USE TEMP B-TREE", output)
+
+    # 絞り込みを伴うフルスキャン・一時B-Treeでのソートは問題として数えること
+    def test_8_04_should_count_unbounded_scans(self):
+        command = Command(stdout=StringIO())
+
+        sql = 'SELECT * FROM "api_vehicle" WHERE "release_year" + 0 = 2019 LIMIT 10'
+        self.assertEqual(command.explain(sql), 1)
+        sql = 'SELECT * FROM "api_vehicle" ORDER BY "release_year" + 0 LIMIT 10'
+        self.assertEqual(command.explain(sql), 2)
@@ -0,0 +1,74 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from .models import Segment, Brand, Vehicle
+from . import metrics
+
+VEHICLES_URL = "/api/vehicles/"
+METRICS_URL = "/api/metrics/"
+
+
+# リクエスト計測のテスト
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        username = "testuser"
+        password = "testuser"
+        self.user = User.objects.create_user(username=username, password=password)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        segment = Segment.objects.create(segment_name="SUV")
+        brand = Brand.objects.create(brand_name="Toyota")
+        Vehicle.objects.create(
+            user=self.user,
+            vehicle_name="MODEL S",
+            release_year=2019,
+            price=500.00,
+            segment=segment,
+            brand=brand,
+        )
+        metrics.registry.reset()
+
+    # Server-TimingヘッダーにDB・シリアライズ・認証・合計の時間が含まれること
+    def test_9_01_should_add_server_timing_header(self):
+        res = self.client.get(VEHICLES_URL)
+
+        entries = [entry.split(";")[0] for entry in res["Server-Timing"].split(", ")]
+        self.assertEqual(entries[0], "db")
+        self.assertIn("serializer", entries)
+        self.assertIn("auth", entries)
+        self.assertEqual(entries[-1], "total")
+
+    # 管理者はルート名ごとのメトリクスをPrometheus形式で取得できること
+    def test_9_02_should_get_metrics_with_admin(self):
+        self.client.get(VEHICLES_URL)
+        self.user.is_staff = True
+        self.user.save()
+
+        res = self.client.get(METRICS_URL)
+        body = res.content.decode()
+
+        # ステータスコード200と一致していること
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/plain"))
+
+        # 一覧取得のリクエスト数・レイテンシ・SQL回数が記録されていること
+        self.assertIn(
+            'api_requests_total{route="api:vehicle-list",method="GET",status="200"} 1',
+            body,
+        )
+        self.assertIn(
+            'api_request_duration_seconds_count{route="api:vehicle-list",method="GET"} 1',
+            body,
+        )
+        self.assertIn('api_request_sql_queries_total{route="api:vehicle-list"}', body)
+        self.assertIn(
+            'api_request_serializer_seconds_total{route="api:vehicle-list"}', body
+        )
+
+    # 管理者以外はメトリクスを取得できないこと
+    def test_9_03_should_not_get_metrics_without_admin(self):
+        res = self.client.get(METRICS_URL)
+
+        # ステータスコード403と一致していること
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
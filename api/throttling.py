@@ -0,0 +1,126 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authtoken.models import Token
+from rest_framework.throttling import BaseThrottle
+
+# 期間の単位 → 秒
+PERIODS = {"s": 1, "min": 60, "hour": 3600, "day": 86400}
+
+
+def get_options():
+    options = {
+        "ENABLED": True,
+        "RATES": {"default": "1200/min"},
+        "ROUTES": {},
+        "MAX_CLIENTS": 100000,
+    }
+    options.update(getattr(settings, "API_THROTTLE", {}))
+    return options
+
+
+# "30/min" → (バケットの容量, 1秒あたりの回復量)
+def parse_rate(rate):
+    count, _, period = rate.partition("/")
+    count = int(count)
+    return count, count / PERIODS[period]
+
+
+# クライアント・ルートごとのトークンバケット
+# 状態は(残り, 更新時刻)のみで、取り出しのたびに経過時間分を回復させる（1回の更新がO(1)）
+# 最近使われていないバケットから削除し、件数をmax_sizeまでに保つ
+# （削除されたバケットは次回満タンで作り直すため、長く使われていないクライアントには影響しない）
+class TokenBuckets:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    # バケットから1件取り出す（取り出せた場合は0、取り出せない場合は1件回復するまでの秒数を返す）
+    def take(self, key, capacity, refill_rate, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            if tokens >= 1:
+                tokens, wait = tokens - 1, 0.0
+            else:
+                wait = (1 - tokens) / refill_rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+buckets = TokenBuckets(get_options()["MAX_CLIENTS"])
+
+
+# クライアント・ルートのバケットから1件取り出す（上限を超えた場合は次の1件を受け付けるまでの秒数を返す）
+# ルートの上限はAPI_THROTTLE["ROUTES"]のスコープ（auth・create・vehiclesなど）ごとに設定する
+def take(client, route):
+    options = get_options()
+    if not options["ENABLED"]:
+        return 0
+    rate = options["RATES"].get(options["ROUTES"].get(route, "default"))
+    if rate is None:
+        return 0
+    capacity, refill_rate = parse_rate(rate)
+    return buckets.take(f"{client}:{route}", capacity, refill_rate)
+
+
+# 認証トークンのクライアントのキー（トークンそのものは保持しない）
+def token_client(key):
+    return f"token:{hashlib.md5(key.encode()).hexdigest()}"
+
+
+# 認証トークン（トークン以外の認証はユーザー、未認証はIPアドレス）とルートごとにリクエスト数を制限し、
+# 超えた場合は429とRetry-After（次の1件を受け付けるまでの秒数）を返す
+# DRFを通らない非同期ビュー（api.async_views）はtake()で同じバケットを使う
+class TokenBucketThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        match = getattr(request, "resolver_match", None)
+        route = match.view_name if match else request.path
+        self.wait_seconds = take(self.get_client(request), route) or None
+        return self.wait_seconds is None
+
+    def get_client(self, request):
+        if isinstance(request.auth, Token):
+            return token_client(request.auth.key)
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+    def wait(self):
+        return self.wait_seconds
+
+
+# 処理中のリクエスト数（同期のスレッド・非同期のタスクの両方を数える）
+class InFlight:
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    # 上限未満なら1件増やしてTrueを返す
+    def enter(self, limit):
+        with self._lock:
+            if self.count >= limit:
+                return False
+            self.count += 1
+            return True
+
+    def leave(self):
+        with self._lock:
+            self.count -= 1
+
+
+in_flight = InFlight()
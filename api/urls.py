@@ -1,6 +1,5 @@
 from django.urls import path, include
-from rest_framework.authtoken.views import obtain_auth_token
-from . import views
+from . import views, async_views
 from rest_framework.routers import DefaultRouter
 
 # Router:ビューとURLを紐づけ
@@ -17,7 +16,40 @@ urlpatterns = [
     path("create/", views.CreateUserView.as_view(), name="create"),
     path("profile/", views.ProfileUserView.as_view(), name="profile"),
     # トークン取得用エンドポイント
-    path("auth/", obtain_auth_token, name="auth"),
+    path("auth/", views.ObtainAuthTokenView.as_view(), name="auth"),
+    # レスポンスキャッシュの統計
+    path("cache/stats/", views.CacheStatsView.as_view(), name="cache-stats"),
+    # Prometheus形式のメトリクス
+    path("metrics/", views.MetricsView.as_view(), name="metrics"),
+    # ASGI用の非同期な読み取りAPI（list/retrieve）
+    path(
+        "async/segments/",
+        async_views.AsyncSegmentView.as_view(),
+        name="async-segment-list",
+    ),
+    path(
+        "async/segments/<int:pk>/",
+        async_views.AsyncSegmentView.as_view(),
+        name="async-segment-detail",
+    ),
+    path(
+        "async/brands/", async_views.AsyncBrandView.as_view(), name="async-brand-list"
+    ),
+    path(
+        "async/brands/<int:pk>/",
+        async_views.AsyncBrandView.as_view(),
+        name="async-brand-detail",
+    ),
+    path(
+        "async/vehicles/",
+        async_views.AsyncVehicleView.as_view(),
+        name="async-vehicle-list",
+    ),
+    path(
+        "async/vehicles/<int:pk>/",
+        async_views.AsyncVehicleView.as_view(),
+        name="async-vehicle-detail",
+    ),
     # ルートにアクセスがあった場合、登録したRouterを参照する
     path("", include(router.urls)),
 ]
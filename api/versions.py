@@ -0,0 +1,97 @@
+import hashlib
+import threading
+
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+from django.utils.http import parse_http_date_safe
+
+from .models import TableVersion
+
+_local = threading.local()
+
+
+# テーブルのバージョンを1つ進める（書き込みと同じトランザクション内で実行する）
+def bump(model):
+    table = model._meta.db_table
+    updated = TableVersion.objects.filter(table=table).update(
+        version=F("version") + 1, updated_at=timezone.now()
+    )
+    if not updated:
+        TableVersion.objects.get_or_create(table=table, defaults={"version": 1})
+
+
+# 削除シグナル用：カスケード削除やQuerySet.delete()では1件ごとにシグナルが届くため、
+# 同じ削除処理の同じモデルは1回だけバージョンを進める
+# 削除処理（Collector.delete）は削除ごとに新しいatomicの中でシグナルを送るため、
+# そのatomicのブロックで削除処理を区別する（同じQuerySetで再度削除した場合も進める）
+def bump_once(model, using):
+    connection = connections[using]
+    if not connection.atomic_blocks:
+        bump(model)
+        return
+    block = connection.atomic_blocks[-1]
+    handled = getattr(_local, "handled", None)
+    if handled is None or handled[0] is not block:
+        handled = _local.handled = (block, set())
+    if model in handled[1]:
+        return
+    handled[1].add(model)
+    bump(model)
+
+
+def _load(models):
+    tables = sorted(model._meta.db_table for model in models)
+    rows = dict(
+        (table, (version, updated_at))
+        for table, version, updated_at in TableVersion.objects.filter(
+            table__in=tables
+        ).values_list("table", "version", "updated_at")
+    )
+    # 巻き戻し（リストアやロールバック）でversionが重複しないよう更新日時も含める
+    versions = ",".join(
+        (
+            f"{table}={rows[table][0]}@{rows[table][1].timestamp()}"
+            if table in rows
+            else f"{table}=0"
+        )
+        for table in tables
+    )
+    return versions, [updated_at for _, updated_at in rows.values()]
+
+
+# 対象テーブルのバージョンを連結した文字列（いずれかが変更されると変わる）
+def fingerprint(models):
+    return _load(models)[0]
+
+
+# 対象テーブルのバージョンからETagとLast-Modifiedを作成する（レスポンス本文は使わない）
+def get_validators(models, request, scope=""):
+    versions, timestamps = _load(models)
+    source = "|".join(
+        [versions, request.get_full_path(), request.META.get("HTTP_ACCEPT", ""), scope]
+    )
+    etag = f'W/"{hashlib.md5(source.encode()).hexdigest()}"'
+    last_modified = int(max(timestamps).timestamp()) if timestamps else None
+    return etag, last_modified
+
+
+# If-None-Match / If-Modified-Sinceからクライアントのデータが最新か判定する
+def is_not_modified(request, etag, last_modified):
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or _strip_weak(etag) in map(_strip_weak, tags)
+
+    if_modified_since = parse_http_date_safe(
+        request.META.get("HTTP_IF_MODIFIED_SINCE", "")
+    )
+    return (
+        if_modified_since is not None
+        and last_modified is not None
+        and last_modified <= if_modified_since
+    )
+
+
+def _strip_weak(tag):
+    return tag[2:] if tag.startswith("W/") else tag
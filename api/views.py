@@ -1,17 +1,55 @@
-from rest_framework import generics, permissions, viewsets, status
+import hashlib
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework import generics, permissions, serializers, viewsets, status
+from rest_framework.decorators import action
+from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.response import Response
 from .serializers import (
     UserSerializer,
     SegmentSerializer,
     BrandSerializer,
     VehicleSerializer,
+    ValuesSerializer,
 )
 from .models import Segment, Brand, Vehicle
+from . import cache as response_cache
+from . import denormalize
+from . import search as vehicle_search
+from . import versions
+from .stats import vehicle_stats
+from .pagination import (
+    SegmentPagination,
+    BrandPagination,
+    VehiclePagination,
+    SearchPagination,
+)
+from .exports import EXPORT_TYPES, get_csv_columns, stream_rows
+from .mixins import (
+    BulkModelMixin,
+    CachedReadMixin,
+    ConditionalGetMixin,
+    IdempotentCreateMixin,
+    TimedAuthenticationMixin,
+    ValuesReadMixin,
+)
+from . import metrics
+from .renderers import PrometheusRenderer
+from .throttling import TokenBucketThrottle
+from .filters import VehicleFilter, IndexedOrderingFilter
+
+
+# トークン取得（ObtainAuthTokenは既定でスロットリングしないため、パスワード検証の回数を制限する）
+class ObtainAuthTokenView(ObtainAuthToken):
+    throttle_classes = [TokenBucketThrottle]
 
 
 # ユーザー作成
 # generics.CreateAPIView・・・登録（POST）
-class CreateUserView(generics.CreateAPIView):
+class CreateUserView(
+    TimedAuthenticationMixin, IdempotentCreateMixin, generics.CreateAPIView
+):
     # UserSerializerを割り当て
     serializer_class = UserSerializer
     # # 認証なしでもアクセス可能にする
@@ -20,7 +58,7 @@ class CreateUserView(generics.CreateAPIView):
 
 # ログインしているユーザーのユーザー情報を返す
 # generics.RetrieveUpdateAPIView・・・取得（GET, PUT, PATCH）
-class ProfileUserView(generics.RetrieveUpdateAPIView):
+class ProfileUserView(TimedAuthenticationMixin, generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
 
     # ログインユーザーを返す
@@ -40,24 +78,238 @@ class ProfileUserView(generics.RetrieveUpdateAPIView):
         return Response(respose, status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
+# レスポンスキャッシュのヒット・ミス数を返す（監視用）
+class CacheStatsView(TimedAuthenticationMixin, generics.GenericAPIView):
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request):
+        return Response(response_cache.cache_stats())
+
+
+# ルートごとのメトリクスをPrometheusのテキスト形式で返す（監視用）
+class MetricsView(TimedAuthenticationMixin, generics.GenericAPIView):
+    permission_classes = (permissions.IsAdminUser,)
+    renderer_classes = (PrometheusRenderer,)
+
+    def get(self, request):
+        return Response(metrics.registry.render_prometheus())
+
+
 # SegmentのCRUD操作を行う
-class SegmentViewSet(viewsets.ModelViewSet):
+class SegmentViewSet(
+    TimedAuthenticationMixin,
+    ConditionalGetMixin,
+    CachedReadMixin,
+    BulkModelMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Segment.objects.all()
     serializer_class = SegmentSerializer
+    pagination_class = SegmentPagination
+    cache_resource = "segments"
+    version_models = (Segment,)
+
+    # 一括更新で名前が変わった場合はVehicleのコピーも更新する
+    def after_bulk_update(self, instances, fields):
+        if "segment_name" in fields:
+            denormalize.propagate_many(Segment, [instance.pk for instance in instances])
 
 
 # BrandのCRUD操作を行う
-class BrandViewSet(viewsets.ModelViewSet):
+class BrandViewSet(
+    TimedAuthenticationMixin,
+    ConditionalGetMixin,
+    CachedReadMixin,
+    BulkModelMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
+    pagination_class = BrandPagination
+    cache_resource = "brands"
+    version_models = (Brand,)
+
+    # 一括更新で名前が変わった場合はVehicleのコピーも更新する
+    def after_bulk_update(self, instances, fields):
+        if "brand_name" in fields:
+            denormalize.propagate_many(Brand, [instance.pk for instance in instances])
 
 
 # VehicleのCRUD操作を行う
-class VehicleViewSet(viewsets.ModelViewSet):
-    queryset = Vehicle.objects.all()
+# list/retrieveはValuesReadMixinでvalues_list()から直接返す（出力はVehicleSerializerと同じ）
+class VehicleViewSet(
+    TimedAuthenticationMixin,
+    ConditionalGetMixin,
+    IdempotentCreateMixin,
+    ValuesReadMixin,
+    BulkModelMixin,
+    viewsets.ModelViewSet,
+):
+    # segment_name/brand_nameを参照するためSegmentとBrandをJOINして一括取得する（N+1対策）
+    queryset = Vehicle.objects.select_related("segment", "brand")
     serializer_class = VehicleSerializer
+    pagination_class = VehiclePagination
+    # 絞り込み（?brand=&release_year_min=など）と並び替え（?ordering=）
+    filter_backends = [VehicleFilter, IndexedOrderingFilter]
+    # 並び替えを許可する列（インデックスのある列のみ）: クエリパラメータ → モデルの列
+    ordering_fields = {
+        "id": "id",
+        "vehicle_name": "vehicle_name",
+        "release_year": "release_year",
+        "price": "price",
+        "segment": "segment_id",
+        "brand": "brand_id",
+        "user": "user_id",
+    }
+    # segment_name/brand_nameを含むためSegment・Brandの変更でもETagを変える
+    version_models = (Vehicle, Segment, Brand)
+    # エクスポート時にDBから一度に読み込む行数
+    export_chunk_size = 2000
+
+    # API_VEHICLE_SCOPE="user"の場合はログインユーザーのVehicleのみを対象にする
+    # （list/retrieve/update/destroy・一括操作・エクスポート・集計）
+    # (user, id)のインデックスで、全体の件数によらずユーザーの件数分だけを読む
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.is_user_scoped():
+            queryset = queryset.filter(user=self.request.user)
+        # API_VEHICLE_DENORMALIZED_NAMESの場合はVehicleのコピー列を読むためJOINしない
+        if denormalize.is_enabled():
+            queryset = queryset.select_related(None)
+        return queryset
+
+    def is_user_scoped(self):
+        return getattr(settings, "API_VEHICLE_SCOPE", "all") == "user"
+
+    # ユーザーごとに内容が変わるため、ETag・集計のキャッシュキーにユーザーを含める
+    def get_validator_scope(self):
+        return f"user:{self.request.user.pk}" if self.is_user_scoped() else ""
+
+    # 読み取り（GET）では出力するフィールドを?fields=id,vehicle_nameで、
+    # 関連先のオブジェクトの埋め込みを?expand=segment,brandで指定できる
+    # 一覧・詳細・検索はvalues_list()の列、エクスポートはonly()の列も指定したフィールドだけになる
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request is not None and self.request.method in SAFE_METHODS:
+            context["fields"] = self.get_query_list(
+                "fields", VehicleSerializer.Meta.fields
+            )
+            context["expand"] = self.get_query_list(
+                "expand", VehicleSerializer.expandable_fields
+            )
+        return context
+
+    # カンマ区切りのクエリパラメータ（choicesのいずれか）をリストにする
+    def get_query_list(self, param, choices):
+        names = [
+            name.strip()
+            for name in self.request.query_params.get(param, "").split(",")
+            if name.strip()
+        ]
+        if any(name not in choices for name in names):
+            raise serializers.ValidationError(
+                {param: [f"Choose from: {', '.join(choices)}"]}
+            )
+        return names
 
     # Vehicleを新規作成する
     def perform_create(self, serializer):
         # user属性に現在ログイン中のユーザーを割り当て
         serializer.save(user=self.request.user)
+
+    # 一括登録時もperform_createと同様にログイン中のユーザーを割り当て
+    def get_bulk_save_kwargs(self):
+        return {"user": self.request.user}
+
+    # 一括登録・更新でもSegment・Brandの名前をコピーする（pre_saveシグナルの代わり）
+    def prepare_bulk_instances(self, instances, fields):
+        for instance in instances:
+            denormalize.copy_names(instance)
+        if fields is not None and fields & {"segment", "brand"}:
+            fields = fields | {"segment_name", "brand_name"}
+        return fields
+
+    # 全件をNDJSON/CSVでストリーミング出力する（GET /api/vehicles/export/?type=csv）
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        export_type = request.query_params.get("type", "ndjson")
+        if export_type not in EXPORT_TYPES:
+            response = {"type": f"Choose one of: {', '.join(EXPORT_TYPES)}"}
+            return Response(response, status=status.HTTP_400_BAD_REQUEST)
+
+        # VehicleSerializerのフィールド定義で1行ずつ変換し、全件をメモリに載せない
+        # 読み込む列・JOINは出力するフィールド（?fields=・?expand=）に必要なものだけにする
+        serializer = self.get_serializer()
+        queryset = ValuesSerializer(serializer).narrow(
+            self.filter_queryset(self.get_queryset()).order_by("id")
+        )
+        rows = (
+            serializer.to_representation(vehicle)
+            for vehicle in queryset.iterator(chunk_size=self.export_chunk_size)
+        )
+
+        content_type, extension = EXPORT_TYPES[export_type]
+        response = StreamingHttpResponse(
+            stream_rows(
+                export_type,
+                rows,
+                get_csv_columns(serializer.fields),
+                self.export_chunk_size,
+            ),
+            content_type=content_type,
+        )
+        response["Content-Disposition"] = f'attachment; filename="vehicles.{extension}"'
+        return response
+
+    # 車名・Segment名・Brand名の全文検索（GET /api/vehicles/search/?q=model&limit=20&offset=0）
+    # 各語の前方一致で検索し、関連度順（車名の一致を重視）に返す（各要素は一覧と同じ形式）
+    @action(detail=False, methods=["get"], pagination_class=SearchPagination)
+    def search(self, request):
+        query = request.query_params.get("q", "")
+        if not vehicle_search.get_terms(query):
+            response = {"q": ["Enter at least one word to search for."]}
+            return Response(response, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.get_queryset()
+        user_id = request.user.pk if self.is_user_scoped() else None
+        ids = self.paginator.paginate_results(
+            lambda limit, offset: vehicle_search.search_ids(
+                queryset, query, limit, offset, user_id=user_id
+            ),
+            request,
+        )
+        # 一致したVehicleをvalues_list()で取得し、関連度の順に並べる
+        # （?fields=でidを出力しない場合も並べ替えに使うためidを合わせて取得する）
+        values_serializer = ValuesSerializer(
+            self.get_serializer(), extra_columns=["id"]
+        )
+        rows = {
+            row.id: row
+            for row in values_serializer.get_rows(queryset.filter(pk__in=ids))
+        }
+        data = values_serializer.to_representation(
+            [rows[pk] for pk in ids if pk in rows]
+        )
+        return self.get_paginated_response(data)
+
+    # 件数・価格（平均/最小/最大）・年式ごとの件数をSegment別・Brand別にDBで集計する
+    # GET /api/vehicles/stats/（絞り込みのクエリパラメータにも対応）
+    @action(detail=False, methods=["get"])
+    def stats(self, request):
+        return self.get_conditional_response(self.get_stats_response, request)
+
+    # 集計結果はテーブルのバージョンをキーにキャッシュし、Vehicle・Segment・Brandの更新で無効になる
+    def get_stats_response(self, request):
+        source = "|".join(
+            [
+                versions.fingerprint(self.version_models),
+                request.get_full_path(),
+                self.get_validator_scope(),
+            ]
+        )
+        key = f"api:vehicle-stats:{hashlib.md5(source.encode()).hexdigest()}"
+        queryset = self.filter_queryset(self.get_queryset())
+        data = response_cache.get_or_compute(
+            "vehicle-stats", key, lambda: vehicle_stats(queryset)
+        )
+        return Response(data)
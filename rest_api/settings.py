@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -44,6 +48,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # リクエストごとの計測（他のミドルウェアの処理時間も含めるため先頭に置く）
+    "api.middleware.RequestMetricsMiddleware",
+    # 処理中のリクエストが多すぎる場合は503を返す（断ったリクエストも計測するため計測の後に置く）
+    "api.middleware.LoadSheddingMiddleware",
+    # 書き込んだクライアントの読み取りをプライマリに固定する（レプリカ使用時）
+    "api.middleware.ReplicaPinningMiddleware",
+    # JSONのレスポンスの圧縮（zstd/br/gzip）
+    "api.middleware.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -59,17 +71,135 @@ CORS_ORIGIN_WHITELIST = [
     "http://localhost:5173",
 ]
 
+# ブラウザから再送の重複防止のヘッダーを送受信できるようにする（API_IDEMPOTENCY）
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+CORS_EXPOSE_HEADERS = ["Idempotent-Replayed"]
+
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachingTokenAuthentication",
         "rest_framework.authentication.BasicAuthentication",  # enables simple command line authentication
         "rest_framework.authentication.SessionAuthentication",
     ],
+    # JSONはorjsonで出力し、Acceptで列形式（application/vnd.columnar+json）も選択できる
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "api.renderers.ColumnarJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    # 認証トークン・ルートごとのリクエスト数の制限（API_THROTTLE）
+    "DEFAULT_THROTTLE_CLASSES": ["api.throttling.TokenBucketThrottle"],
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.IdCursorPagination",
+    "PAGE_SIZE": 100,
+}
+
+# 一覧APIの1ページあたりの件数（?page_size=で上書き可能、上限はmax）
+API_PAGE_SIZES = {
+    "segments": 100,
+    "brands": 100,
+    "vehicles": 100,
+    "search": 20,
+    "max": 1000,
+}
+
+# Vehicleの全文検索（/api/vehicles/search/?q=）
+# MAX_TERMS: 検索に使う語の最大数、MIN_PREFIX: 前方一致にする語の最小の文字数
+# WEIGHTS: 関連度の重み（車名・Segment名・Brand名）
+# MAX_RESULTS: 関連度順に並べる車名の一致の最大数（新しいものから、それ以外の一致は新しい順に続ける）
+API_SEARCH = {
+    "MAX_TERMS": 8,
+    "MIN_PREFIX": 2,
+    "WEIGHTS": (10.0, 2.0, 2.0),
+    "MAX_RESULTS": 1000,
+}
+
+# キャッシュ（BACKENDを差し替えればRedis・Memcachedなども利用可能）
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "api",
+    }
+}
+
+# Segment・Brandのlist/retrieveのレスポンスキャッシュ
+API_RESPONSE_CACHE = {
+    "ALIAS": "default",
+    "TIMEOUT": 300,
+}
+
+# レスポンスの圧縮（MIN_SIZE[バイト]未満は圧縮しない、br/zstdはbrotli/zstandardがあれば使用）
+API_COMPRESSION = {
+    "MIN_SIZE": 1024,
+    "GZIP_LEVEL": 6,
+    "BROTLI_QUALITY": 5,
+    "ZSTD_LEVEL": 3,
+    "CONTENT_TYPES": ["application/json", "application/vnd.columnar+json"],
+}
+
+# トークン認証のキャッシュ（件数上限・有効期限[秒]）
+API_TOKEN_CACHE = {
+    "MAX_SIZE": 10000,
+    "TTL": 300,
+}
+
+# 認証トークン（未認証はIPアドレス）とルートごとのリクエスト数の制限（トークンバケット、プロセスごと）
+# RATES: スコープごとの上限（"件数/s|min|hour|day"、件数まで連続で受け付け、期間で全回復する）
+# ROUTES: ルート名 → スコープ（パスワードの検証・ユーザー作成・Vehicleの一覧など重い処理は別の上限）
+# MAX_CLIENTS: 保持するバケットの最大数（最近使われていないものから削除）
+API_THROTTLE = {
+    "ENABLED": True,
+    "RATES": {
+        "auth": "30/min",
+        "create": "20/min",
+        "vehicles": "600/min",
+        "default": "1200/min",
+    },
+    "ROUTES": {
+        "api:auth": "auth",
+        "api:create": "create",
+        "api:vehicle-list": "vehicles",
+        "api:vehicle-search": "vehicles",
+        "api:vehicle-export": "vehicles",
+        "api:async-vehicle-list": "vehicles",
+        "api:async-vehicle-detail": "vehicles",
+    },
+    "MAX_CLIENTS": 100000,
 }
 
+# 処理中のリクエストがMAX_IN_FLIGHTに達したら503とRetry-After（RETRY_AFTER秒）を返す（プロセスごと）
+# EXEMPT_PATHS: 過負荷時も受け付けるパス（監視用）
+API_LOAD_SHEDDING = {
+    "MAX_IN_FLIGHT": 64,
+    "RETRY_AFTER": 1,
+    "EXEMPT_PATHS": ["/api/metrics/"],
+}
+
+# Idempotency-Keyでの再送の重複防止（/api/vehicles/・/api/create/のPOST）
+# MAX_SIZE件・TTL秒まで最初のレスポンスを保存する（プロセスごと）
+# LOCK_TIMEOUT: 同じキーのリクエストが処理中の場合に待つ秒数（超えた場合は409）
+API_IDEMPOTENCY = {
+    "HEADER": "Idempotency-Key",
+    "MAX_KEY_LENGTH": 255,
+    "MAX_SIZE": 10000,
+    "TTL": 86400,
+    "LOCK_TIMEOUT": 10,
+}
+
+# Vehicleの参照・更新の範囲（all: 全ユーザーのVehicle、user: ログインユーザーのVehicleのみ）
+API_VEHICLE_SCOPE = os.environ.get("API_VEHICLE_SCOPE", "all")
+
+# Vehicleの一覧・詳細・集計でsegment_name/brand_nameをVehicleのコピー列から読むか（JOINしない）
+# 有効にする前に python manage.py backfill_vehicle_names で既存の行に反映する
+API_VEHICLE_DENORMALIZED_NAMES = (
+    os.environ.get("API_VEHICLE_DENORMALIZED_NAMES", "0") == "1"
+)
+
+# 一括登録・更新API（/bulk/）で1リクエストに含められる最大件数
+API_BULK_MAX_SIZE = 10000
+
 ROOT_URLCONF = "rest_api.urls"
 
 TEMPLATES = [
@@ -94,13 +224,80 @@ WSGI_APPLICATION = "rest_api.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# 接続設定のプロファイル（環境変数API_DATABASE_PROFILEで選択する）
+# production: WALで読み取りと書き込みを並行させ、接続を使い回す
+API_DATABASE_PROFILES = {
+    "default": {},
+    "production": {
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+        # 接続のたびに実行するPRAGMA（api.database.apply_pragmas）
+        "PRAGMAS": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "mmap_size": 268435456,  # 256MB
+            "cache_size": -65536,  # 64MB（負の値はKiB単位）
+            "busy_timeout": 5000,  # ミリ秒
+            "temp_store": "MEMORY",
+        },
+    },
+}
+API_DATABASE_PROFILE = os.environ.get("API_DATABASE_PROFILE", "default")
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        **API_DATABASE_PROFILES[API_DATABASE_PROFILE],
     }
 }
 
+# 読み取り専用のレプリカのエイリアス（書き込みはdefault、読み取りはレプリカに振り分ける）
+# 環境変数API_DATABASE_REPLICAにSQLiteのファイルを指定すると有効になる
+# （python manage.py sync_replicaでdefaultの内容を複製する）
+API_DATABASE_REPLICAS = []
+if os.environ.get("API_DATABASE_REPLICA"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": os.environ["API_DATABASE_REPLICA"],
+        "TEST": {"MIRROR": "default"},
+    }
+    API_DATABASE_REPLICAS.append("replica")
+
+DATABASE_ROUTERS = ["api.db_routers.ReplicaRouter"]
+
+# 書き込み後にプライマリから読み取る期間[秒]（レプリカへの反映の遅れより長くする）
+API_REPLICA_PIN_SECONDS = 10
+
+
+# パスワードのハッシュ方式（環境変数API_PASSWORD_HASHERで選択、既定はargon2（未インストールならscrypt））
+# 先頭が新しく保存する方式、以降は検証のみ（ログイン時に先頭の方式で保存し直す）
+API_PASSWORD_HASHERS = {
+    "argon2": "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "scrypt": "django.contrib.auth.hashers.ScryptPasswordHasher",
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+}
+API_PASSWORD_HASHER = os.environ.get(
+    "API_PASSWORD_HASHER", "argon2" if find_spec("argon2") else "scrypt"
+)
+PASSWORD_HASHERS = [
+    API_PASSWORD_HASHERS[API_PASSWORD_HASHER],
+    *(
+        hasher
+        for name, hasher in API_PASSWORD_HASHERS.items()
+        if name != API_PASSWORD_HASHER
+    ),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+
+# パスワードのハッシュ計算を行うスレッド数・待機数の上限（超えた場合は503とRetry-After[秒]を返す）
+API_PASSWORD_HASHING = {
+    "WORKERS": 2,
+    "QUEUE_SIZE": 16,
+    "RETRY_AFTER": 1,
+}
+
+AUTHENTICATION_BACKENDS = ["api.authentication.PooledModelBackend"]
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators